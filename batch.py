@@ -0,0 +1,147 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+Colours directories of 12-bit captures with a gradient exported by "Export Points".
+
+Example:
+python batch.py theme.txt captures/ coloured/ --format png --shape 1080x1920
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from colorize import colorize, colorize_file, open_frames
+from lut import build_lut, depth_for_points, CHANNELS, INPUT_BITS, OUTPUT_BITS
+from points_io import read_points
+from pngwriter import PNGWriter
+
+INPUT_PATTERNS = ("*.u16", "*.npy")
+# Rows coloured per PNG block
+PNG_BLOCK_ROWS = 256
+
+# Built once per worker process by init_worker
+_worker_lut = None
+
+
+def init_worker(points, depth=None):
+    global _worker_lut
+    depth = depth_for_points(points) if depth is None else depth
+    _worker_lut = build_lut(*(points[color] for color in CHANNELS), size=depth.size, dtype=depth.dtype)
+
+
+def colorize_png(src_path, dst_path, lut, shape=None, alpha=False):
+    frames = open_frames(src_path, shape)
+    if frames.ndim != 2:
+        raise ValueError(f"{src_path}: PNG output needs a 2-D frame, got shape {frames.shape}; pass --shape.")
+
+    height, width = frames.shape
+    channels = 4 if alpha else 3
+    block = np.empty((min(PNG_BLOCK_ROWS, height), width, channels), dtype=lut.dtype)
+    bit_depth = 16 if lut.dtype == np.uint16 else 8
+    with PNGWriter(dst_path, width, height, channels=channels, bit_depth=bit_depth) as png:
+        for start in range(0, height, PNG_BLOCK_ROWS):
+            rows = frames[start:start + PNG_BLOCK_ROWS]
+            png.write_rows(colorize(rows, lut, out=block[:len(rows)]))
+    return frames.size
+
+
+def frame_count(frames):
+    # A 2-D array (or a flat raw file) is one frame, any leading axes count frames
+    return int(np.prod(frames.shape[:-2])) if frames.ndim > 2 else 1
+
+
+def process_file(src_path, dst_path, output_format, shape, alpha):
+    """
+    Returns:
+    Tuple (src_path, input bytes, frames coloured, seconds)
+    """
+    start = time.perf_counter()
+    if output_format == "png":
+        colorize_png(src_path, dst_path, _worker_lut, shape, alpha)
+        frames = 1
+    else:
+        frames = frame_count(open_frames(src_path, shape))
+        colorize_file(src_path, dst_path, _worker_lut, shape, alpha)
+    return src_path, os.path.getsize(src_path), frames, time.perf_counter() - start
+
+
+def find_inputs(input_dir, patterns=INPUT_PATTERNS):
+    files = set()
+    for pattern in patterns:
+        files.update(glob.glob(os.path.join(input_dir, pattern)))
+    return sorted(files)
+
+
+def output_path(src_path, output_dir, output_format):
+    name = os.path.splitext(os.path.basename(src_path))[0]
+    return os.path.join(output_dir, f"{name}.{output_format}")
+
+
+def parse_shape(text):
+    if text is None:
+        return None
+    return tuple(int(v) for v in text.lower().split("x"))
+
+
+def run(points_path, input_dir, output_dir, output_format="png", shape=None, alpha=False, workers=None,
+        depth=None):
+    points = read_points(points_path)
+    files = find_inputs(input_dir)
+    if not files:
+        print(f"No {' or '.join(INPUT_PATTERNS)} files in {input_dir}")
+        return 0
+
+    os.makedirs(output_dir, exist_ok=True)
+    total_bytes = 0
+    total_frames = 0
+    failures = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(points, depth)) as pool:
+        futures = {pool.submit(process_file, path, output_path(path, output_dir, output_format),
+                               output_format, shape, alpha): path for path in files}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                path, size, frames, seconds = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(files)}] {os.path.basename(futures[future])} failed: {e}")
+                continue
+            total_bytes += size
+            total_frames += frames
+            print(f"[{done}/{len(files)}] {os.path.basename(path)} {size / 1e6:.1f} MB in {seconds:.2f} s")
+
+    elapsed = time.perf_counter() - start
+    print(f"{total_frames} frames in {elapsed:.2f} s: {total_frames / elapsed:.1f} frames/s, "
+          f"{total_bytes / 1e6 / elapsed:.1f} MB/s")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Colour directories of 10- to 16-bit captures with an exported gradient.")
+    parser.add_argument("points", help="points file written by Export Points")
+    parser.add_argument("input_dir", help="directory of .u16 or .npy frames")
+    parser.add_argument("output_dir")
+    parser.add_argument("--format", choices=("png", "rgb"), default="png", help="output format (default: png)")
+    parser.add_argument("--shape", help="frame shape of raw .u16 files as HEIGHTxWIDTH")
+    parser.add_argument("--alpha", action="store_true", help="write RGBA instead of RGB")
+    parser.add_argument("--workers", type=int, help="number of processes (default: all cores)")
+    parser.add_argument("--input-bits", type=int, choices=INPUT_BITS, help="input resolution (default: from the points)")
+    parser.add_argument("--output-bits", type=int, choices=OUTPUT_BITS, help="output depth (default: from the points)")
+    args = parser.parse_args(argv)
+
+    depth = depth_for_points(read_points(args.points), args.input_bits, args.output_bits)
+    failures = run(args.points, args.input_dir, args.output_dir, args.format,
+                   parse_shape(args.shape), args.alpha, args.workers, depth)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+Performance measurements for the gradient editor.
+
+python benchmark.py startup
+python benchmark.py core drag --json results.json
+python benchmark.py all --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+# Startup budgets, measured on top of a bare interpreter start
+CORE_IMPORT_TARGET_MS = 150
+GUI_LAUNCH_TARGET_MS = 1500
+
+GUI_LAUNCH_CODE = """
+from PyQt5 import QtWidgets
+app = QtWidgets.QApplication([])
+from Main import Main
+obj = Main()
+obj.MainWindow.show()
+app.processEvents()
+"""
+
+# Points per channel the gradient math is measured at
+STOP_COUNTS = (2, 10, 20)
+# Gradients per build_luts call
+STACK_GRADIENTS = 256
+DRAG_EVENTS = 500
+# Slowdown over the baseline that counts as a regression
+BASELINE_TOLERANCE = 0.25
+
+CORE_IMPORT_CODE = """
+import sys
+import Main, core
+assert not any(name.startswith(("PyQt5", "matplotlib")) for name in sys.modules), "core imported the GUI stack"
+"""
+
+
+def offscreen_env():
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def time_process(code, repeat=5):
+    # Best wall time of a fresh interpreter running code, in ms
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=here, env=offscreen_env(), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, (time.perf_counter() - start) * 1e3)
+    return best
+
+
+def startup(repeat=5):
+    interpreter = time_process("pass", repeat)
+    return {
+        "interpreter_ms": interpreter,
+        "core_import_ms": time_process(CORE_IMPORT_CODE, repeat) - interpreter,
+        "gui_launch_ms": time_process(GUI_LAUNCH_CODE, repeat) - interpreter,
+    }
+
+
+class _Color:
+    # Just enough of QColor for reduce_gradient_stops, without importing Qt
+    __slots__ = ("rgba",)
+
+    def __init__(self, r, g, b, a=255):
+        self.rgba = (r, g, b, a)
+
+    def red(self):
+        return self.rgba[0]
+
+    def green(self):
+        return self.rgba[1]
+
+    def blue(self):
+        return self.rgba[2]
+
+    def alpha(self):
+        return self.rgba[3]
+
+
+def random_points(count, seed=0):
+    # count points per channel from 0 to 4095, the same for every run
+    rng = np.random.RandomState(seed)
+    points = {}
+    for color in ("Red", "Green", "Blue"):
+        xs = np.sort(rng.choice(np.arange(1, 4095), count - 2, replace=False)).tolist()
+        ys = rng.randint(0, 256, count).tolist()
+        points[color] = list(zip([0] + xs + [4095], ys))
+    return points
+
+
+def time_call(func, repeat=5):
+    # Best time of one call, in us
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def core(repeat=5):
+    from core import (build_lut, build_luts, calculate_color, calculate_gradient, find_closest_point, generate_gradient_string,
+                      gradient_stops, pack_points, reduce_gradient_stops)
+    from stops import merged_breakpoints, normalized_stops
+
+    results = {}
+    signal = np.arange(4096).tolist()
+    for count in STOP_COUNTS:
+        points = random_points(count)
+        red, green, blue = points["Red"], points["Green"], points["Blue"]
+        # Every merged breakpoint as a stop, the input reduce_gradient_stops gets from a QLinearGradient
+        stops = [(pos, _Color(*color)) for pos, color in normalized_stops(zip(*merged_breakpoints(red, green, blue)))]
+
+        def uncached_gradient_string():
+            gradient_stops.cache_clear()
+            return generate_gradient_string(red, green, blue)
+
+        results[f"calculate_color_{count}_us"] = time_call(lambda: calculate_color(2047, red), repeat)
+        results[f"calculate_gradient_{count}_us"] = time_call(
+            lambda: calculate_gradient(red, green, blue, signal), repeat)
+        results[f"generate_gradient_string_{count}_us"] = time_call(uncached_gradient_string, repeat)
+        results[f"generate_gradient_string_cached_{count}_us"] = time_call(
+            lambda: generate_gradient_string(red, green, blue), repeat)
+        results[f"reduce_gradient_stops_{count}_us"] = time_call(lambda: reduce_gradient_stops(stops, 10), repeat)
+        results[f"find_closest_point_{count}_us"] = time_call(lambda: find_closest_point((2047, 128), red), repeat)
+        results[f"build_lut_{count}_us"] = time_call(lambda: build_lut(red, green, blue), repeat)
+        # 16-bit input and output: the points scaled up to 0..65535
+        wide = [[(x * 16 + x // 256, y * 257) for x, y in points[color]] for color in ("Red", "Green", "Blue")]
+        results[f"build_lut_16bit_{count}_us"] = time_call(
+            lambda: build_lut(*wide, size=1 << 16, dtype=np.uint16), repeat)
+        # Per gradient, from a stack of STACK_GRADIENTS evaluated in one call
+        packed = pack_points([random_points(count) for _ in range(STACK_GRADIENTS)])
+        results[f"build_luts_{count}_us"] = time_call(lambda: build_luts(*packed), repeat) / STACK_GRADIENTS
+    return results
+
+
+def drag(repeat=5, events=DRAG_EVENTS):
+    # A drag through the real editor: every motion event is handled and rendered before the next one
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5 import QtWidgets
+    from matplotlib.backend_bases import MouseEvent
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    from Main import Main
+
+    obj = Main()
+    obj.MainWindow.resize(1200, 800)
+    obj.MainWindow.show()
+    app.processEvents()
+    for color, points in random_points(10).items():
+        obj.points[color] = points
+    obj.schedule_refresh()
+    obj.scheduler.flush()
+
+    def event(name, x, y, button=None):
+        px, py = obj.ax.transData.transform((x, y))
+        return MouseEvent(name, obj.canvas, px, py, button=button)
+
+    x, y = obj.points["Red"][len(obj.points["Red"]) // 2]
+    ys = 128 + 120 * np.sin(np.linspace(0, 4 * np.pi, events))
+    motions = [event("motion_notify_event", x, value) for value in ys]
+
+    # Every repetition is a whole drag, their samples are pooled for the percentiles
+    latencies = []
+    for _ in range(repeat):
+        obj.on_click(event("button_press_event", x, obj.points["Red"][len(obj.points["Red"]) // 2][1], 1))
+        for motion in motions:
+            start = time.perf_counter()
+            obj.on_motion(motion)
+            obj.scheduler.flush()
+            latencies.append((time.perf_counter() - start) * 1e3)
+        obj.on_release(event("button_release_event", x, ys[-1], 1))
+    obj.MainWindow.close()
+
+    latencies = np.asarray(latencies)
+    results = {f"drag_p{p}_ms": float(np.percentile(latencies, p)) for p in (50, 90, 99)}
+    results["drag_max_ms"] = float(latencies.max())
+    results["drag_mean_ms"] = float(latencies.mean())
+    return results
+
+
+SUITES = {"startup": startup, "core": core, "drag": drag}
+
+
+def report(suite, results):
+    print(f"[{suite}]")
+    for name, value in results.items():
+        print(f"  {name:40} {value:12.3f}")
+
+
+def compare(results, baseline, tolerance=BASELINE_TOLERANCE):
+    """
+    Compares results with a baseline saved by --json. Every metric is a time, lower is better.
+
+    Returns:
+    True if any metric is slower than the baseline by more than the tolerance
+    """
+    failed = False
+    for suite, metrics in results.items():
+        for name, value in metrics.items():
+            base = baseline.get(suite, {}).get(name)
+            if not base:
+                continue
+            ratio = value / base
+            regressed = ratio > 1 + tolerance
+            failed |= regressed
+            print(f"  {suite}.{name:40} {base:10.3f} -> {value:10.3f}  x{ratio:5.2f} {'REGRESSED' if regressed else ''}")
+    return failed
+
+
+def report_startup(results):
+    failed = False
+    for name, target in (("core_import_ms", CORE_IMPORT_TARGET_MS), ("gui_launch_ms", GUI_LAUNCH_TARGET_MS)):
+        ok = results[name] <= target
+        failed |= not ok
+        print(f"{name:16} {results[name]:8.1f} ms  (target {target} ms) {'ok' if ok else 'OVER'}")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the gradient editor.")
+    parser.add_argument("suites", nargs="+", choices=tuple(SUITES) + ("all",))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="save the results to this file")
+    parser.add_argument("--baseline", help="compare with results saved by --json")
+    parser.add_argument("--tolerance", type=float, default=BASELINE_TOLERANCE,
+                        help="allowed slowdown over the baseline (default: 0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    suites = list(SUITES) if "all" in args.suites else args.suites
+    results = {}
+    failed = False
+    for suite in suites:
+        results[suite] = SUITES[suite](args.repeat)
+        if suite == "startup":
+            failed |= report_startup(results[suite])
+        else:
+            report(suite, results[suite])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        print(f"[compared with {args.baseline}]")
+        with open(args.baseline) as f:
+            failed |= compare(results, json.load(f), args.tolerance)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    A bounded mapping that forgets the least recently used entry first.
+
+    Keys are usually the point tuples of a gradient (or a Snapshot, which hashes the
+    same way), so revisiting a recent state finds its derived data again.
+    """
+
+    __slots__ = ("maxsize", "hits", "misses", "_entries")
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get_or_build(self, key, build):
+        # Sentinel rather than None, a cached value may be falsy
+        value = self.get(key, self)
+        if value is self:
+            value = build()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,142 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+import numpy as np
+
+# Number of input values coloured per pass; bounds the scratch buffers to a few MB
+CHUNK_SIZE = 1 << 20
+
+
+def rgba_lut(lut):
+    """
+    Appends an opaque alpha column to a (n, 3) lookup table.
+
+    Arguments:
+    lut -- uint8 array of shape (n, 3)
+
+    Returns:
+    uint8 array of shape (n, 4)
+    """
+    table = np.empty((len(lut), 4), dtype=lut.dtype)
+    table[:, :3] = lut
+    table[:, 3] = np.iinfo(lut.dtype).max
+    return table
+
+
+def _channel_lut(lut, channels):
+    if channels == lut.shape[1]:
+        return np.ascontiguousarray(lut)
+    if channels == 4 and lut.shape[1] == 3:
+        return rgba_lut(lut)
+    raise ValueError("Output must have 3 (RGB) or 4 (RGBA) channels.")
+
+
+def _colorize_flat(values, table, out, chunk_size):
+    # values and out are 1-D / 2-D views; the index buffer is reused for every chunk
+    index = np.empty(min(chunk_size, len(values)), dtype=np.intp)
+    for start in range(0, len(values), chunk_size):
+        stop = min(start + chunk_size, len(values))
+        idx = index[:stop - start]
+        np.copyto(idx, values[start:stop], casting="unsafe")
+        np.take(table, idx, axis=0, out=out[start:stop], mode="clip")
+
+
+def colorize(values, lut, out=None, alpha=False, chunk_size=CHUNK_SIZE):
+    """
+    Colours 12-bit data through a gradient lookup table.
+
+    Values above the end of the table are clamped to its last entry.
+
+    Arguments:
+    values -- uint16 array of any shape
+    lut -- uint8 or uint16 array of shape (n, 3), e.g. GradientLUT.table(points), or a SegmentedLUT
+    out -- optional C-contiguous output of shape values.shape + (3,) or (4,)
+    alpha -- write RGBA instead of RGB when out is not given (default: False)
+    chunk_size -- number of values coloured per pass
+
+    Returns:
+    The output array
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in "ui":
+        raise TypeError("Expected integer input, got {}.".format(values.dtype))
+
+    if out is None:
+        out = np.empty(values.shape + (4 if alpha else 3,), dtype=lut.dtype)
+    if out.shape[:-1] != values.shape:
+        raise ValueError("Output shape {} does not match input shape {}.".format(out.shape, values.shape))
+    if not out.flags.c_contiguous or out.dtype != lut.dtype:
+        raise ValueError("Output must be a C-contiguous {} array.".format(lut.dtype))
+
+    if hasattr(lut, "evaluate"):
+        # A SegmentedLUT has no table to index, its breakpoints are evaluated chunk by chunk
+        _colorize_segmented(values.reshape(-1), lut, out.reshape(-1, out.shape[-1]), chunk_size)
+        return out
+
+    table = _channel_lut(lut, out.shape[-1])
+    _colorize_flat(values.reshape(-1), table, out.reshape(-1, out.shape[-1]), chunk_size)
+    return out
+
+
+def _colorize_segmented(values, lut, out, chunk_size):
+    for start in range(0, len(values), chunk_size):
+        stop = min(start + chunk_size, len(values))
+        lut.evaluate(values[start:stop], out=out[start:stop, :3])
+    if out.shape[1] == 4:
+        out[:, 3] = np.iinfo(out.dtype).max
+
+
+def open_frames(path, shape=None):
+    """
+    Memory-maps a raw little-endian .u16 file or a .npy file without reading it.
+
+    Arguments:
+    path -- input file
+    shape -- optional shape for raw files (default: flat)
+
+    Returns:
+    Read-only uint16 memmap
+    """
+    if path.lower().endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    data = np.memmap(path, dtype="<u2", mode="r")
+    return data.reshape(shape) if shape is not None else data
+
+
+def colorize_file(src_path, dst_path, lut, shape=None, alpha=False, chunk_size=CHUNK_SIZE):
+    """
+    Colours a memory-mapped capture chunk by chunk into a memory-mapped output.
+
+    A .npy destination keeps the input shape with a trailing channel axis; any
+    other destination is written as raw interleaved RGB(A) bytes.
+
+    Arguments:
+    src_path -- .u16 or .npy input file
+    dst_path -- output file
+    lut -- uint8 array of shape (4096, 3)
+    shape -- optional shape for raw input files
+    alpha -- write RGBA instead of RGB (default: False)
+    chunk_size -- number of values coloured per pass
+
+    Returns:
+    Number of values coloured
+    """
+    src = open_frames(src_path, shape)
+    channels = 4 if alpha else 3
+    out_shape = src.shape + (channels,)
+
+    if src.size == 0:
+        open(dst_path, "wb").close()
+        return 0
+
+    if dst_path.lower().endswith(".npy"):
+        dst = np.lib.format.open_memmap(dst_path, mode="w+", dtype=lut.dtype, shape=out_shape)
+    else:
+        dst = np.memmap(dst_path, dtype=lut.dtype, mode="w+", shape=out_shape)
+
+    table = _channel_lut(lut, channels)
+    _colorize_flat(src.reshape(-1), table, dst.reshape(-1, channels), chunk_size)
+    dst.flush()
+    del dst
+    return src.size
+
@@ -0,0 +1,146 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+# Gradient math shared by the editor, the batch tools and worker processes.
+# Only depends on NumPy: importing it never pulls in Qt or matplotlib.
+
+import functools
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from colorize import colorize, colorize_file
+from lut import (LUT_SIZE, CHANNELS, DEFAULT_DEPTH, BitDepth, GradientLUT, SegmentedLUT,
+                 build_lut, evaluate_channel, interpolate_channel)
+from lut_stack import MAX_POINTS, build_luts, pack_points
+from point_store import PointStore
+from points_io import format_lut, format_points, parse_points, read_points, write_points, read_lut, write_lut
+from stops import reduce_stops, normalized_stops
+
+__all__ = [
+    "LUT_SIZE", "CHANNELS", "DEFAULT_DEPTH", "STYLESHEET_MAX_STOPS", "STYLESHEET_MAX_ERROR",
+    "BitDepth", "GradientLUT", "SegmentedLUT", "PointStore",
+    "build_lut", "build_luts", "pack_points", "MAX_POINTS", "evaluate_channel", "interpolate_channel", "channel_table",
+    "calculate_color", "calculate_gradient", "find_closest_point",
+    "generate_gradient_string", "gradient_stops", "gradient_string", "stops_string", "reduce_gradient_stops",
+    "reduce_stops", "normalized_stops",
+    "colorize", "colorize_file",
+    "format_lut", "format_points", "parse_points", "read_points", "write_points", "read_lut", "write_lut",
+]
+
+# Most stops put into the preview's qlineargradient stylesheet
+STYLESHEET_MAX_STOPS = 10
+# Allowed per-channel deviation of the stylesheet stops, in colour levels
+STYLESHEET_MAX_ERROR = 0.5
+
+
+def find_closest_point(ref_point, points_list):
+    # Nearest point within 200 data units; squared distances avoid the sqrt per point
+    closest_point = None
+    closest_distance = 200 ** 2
+    for point in points_list:
+        distance = (point[0] - ref_point[0]) ** 2 + (point[1] - ref_point[1]) ** 2
+        if distance < closest_distance:
+            closest_point = point
+            closest_distance = distance
+    return closest_point
+
+
+def generate_gradient_string(red_points, green_points, blue_points, max_stops=STYLESHEET_MAX_STOPS,
+                             depth=DEFAULT_DEPTH):
+    key = tuple(tuple(map(tuple, points)) for points in (red_points, green_points, blue_points))
+    return stops_string(gradient_stops(*key, max_stops=max_stops, depth=depth))
+
+
+@functools.lru_cache(maxsize=32)
+def gradient_stops(red_points, green_points, blue_points, max_stops=STYLESHEET_MAX_STOPS, depth=DEFAULT_DEPTH):
+    # Reduced stops of recent point sets (tuples), so undo/redo doesn't solve the reduction again
+    max_error = STYLESHEET_MAX_ERROR * depth.y_max / 255
+    stops, _ = reduce_stops(red_points, green_points, blue_points, max_error, max_stops)
+    return tuple(normalized_stops(stops, depth.size, depth.y_max))
+
+
+def reduce_gradient_stops(stops, num_stops=10):
+    """
+    Reduces a list of gradient stops to a smaller number of stops.
+
+    Arguments:
+    stops -- list of tuples (pos, color) representing gradient stops
+    num_stops -- desired number of stops in the reduced list (default: 10)
+
+    Returns:
+    List of tuples (pos, color) representing the reduced gradient stops
+    """
+    # Ensure that there are at least two stops
+    if len(stops) < 2:
+        raise ValueError("At least 2 stops are required.")
+
+    # If the number of stops is less than or equal to the desired number, return the original stops
+    if len(stops) <= num_stops:
+        return stops
+
+    # Otherwise, calculate the positions of the reduced stops
+    reduced_positions = [i * (1.0 / (num_stops - 1)) for i in range(num_stops)]
+
+    # Find the closest original stop for each reduced position
+    positions = [stop[0] for stop in stops]
+    reduced_stops = []
+    for pos in reduced_positions:
+        # Find the two closest original stops with a binary search
+        prev_stop = stops[max(bisect_left(positions, pos) - 1, 0)]
+        next_stop = stops[min(bisect_right(positions, pos), len(stops) - 1)]
+
+        # Interpolate the color between the two closest stops
+        prev_pos, prev_color = prev_stop
+        next_pos, next_color = next_stop
+        t = (pos - prev_pos) / (next_pos - prev_pos)
+        # Same colour type as the input (e.g. QColor) without importing Qt here
+        interp_color = type(prev_color)(
+            int((1 - t) * prev_color.red() + t * next_color.red()),
+            int((1 - t) * prev_color.green() + t * next_color.green()),
+            int((1 - t) * prev_color.blue() + t * next_color.blue()),
+            int((1 - t) * prev_color.alpha() + t * next_color.alpha())
+        )
+
+        reduced_stops.append((pos, interp_color))
+
+    return reduced_stops
+
+
+@functools.lru_cache(maxsize=32)
+def channel_table(points):
+    # Every integer input of one channel, evaluated once per distinct point tuple
+    table = evaluate_channel(points, np.arange(LUT_SIZE))
+    table.flags.writeable = False
+    return table
+
+
+def calculate_color(x, points):
+    if isinstance(x, (int, np.integer)) and 0 <= x < LUT_SIZE:
+        return int(channel_table(tuple(points))[x])
+    return int(evaluate_channel(points, x))
+
+
+def stops_string(stops):
+    return ", ".join(
+        ["stop:{0:.3f} rgba({1},{2},{3},{4})".format(stop, *color) for stop, color in stops])
+
+
+def gradient_string(gradient):
+    stops = gradient.stops()
+    new = [(stop, color) for stop, color in stops]
+    stops = reduce_gradient_stops(new, num_stops=10)
+    return stops_string([(stop, color.getRgb()) for stop, color in stops])
+
+
+def calculate_gradient(red_points, green_points, blue_points, signal_points):
+
+    signal_points = np.asarray(signal_points, dtype=np.float64)
+    red = interpolate_channel(red_points, signal_points)
+    green = interpolate_channel(green_points, signal_points)
+    blue = interpolate_channel(blue_points, signal_points)
+
+    # Calculate the gradient value for every signal point at once
+    gradient_values = 0.2126 * red + 0.7152 * green + 0.0722 * blue
+
+    return gradient_values.tolist()
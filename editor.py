@@ -0,0 +1,703 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+import argparse
+import os
+import sys
+import warnings
+
+import numpy as np
+from PyQt5 import QtWidgets
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QActionGroup, QDockWidget, QFileDialog, QInputDialog, QLabel, QListWidget, QMessageBox
+from PyQt5.QtWidgets import QShortcut
+from PyQt5.QtWidgets import QVBoxLayout, QHeaderView, QTableView
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+
+from GUI import Ui_MainWindow
+from history import History
+from profiling import Profiler, profiling_requested
+from core import DEFAULT_DEPTH, BitDepth, GradientLUT, PointStore, colorize, read_points, write_lut
+from lut import CHANNELS, INPUT_BITS, OUTPUT_BITS, depth_for_points, to_8bit
+from image_export import EXPORT_HEIGHT, export_gradient_image
+from preview import GradientPreview
+from hit_test import PointPicker
+from scheduler import RenderScheduler, FULL, FRAME_INTERVAL
+from table_model import PointTableModel, TABLE_STYLE
+
+warnings.filterwarnings("ignore")
+
+# How often the profiling readout is refreshed, in ms
+READOUT_INTERVAL = 250
+
+# Save dialog filters of the gradient image and their bit depth
+IMAGE_FILTERS = {
+    "PNG Files (*.png)": 8,
+    "16-bit PNG Files (*.png)": 16,
+    "Raw RGB Files (*.rgb)": 8,
+}
+# Save dialog filters of Export Points: the points themselves or the expanded LUT
+POINT_FILTERS = ";;".join([
+    "Text Files (*.txt)",
+    "NumPy LUT (*.npy)",
+    "Raw RGB LUT (*.raw)",
+    "C Header (*.h)",
+    "Cube LUT (*.cube)",
+    "CSV LUT (*.csv)",
+])
+
+
+class Main:
+    def __init__(self, depth=DEFAULT_DEPTH):
+        self.MainWindow = QtWidgets.QMainWindow()
+        self.ui = Ui_MainWindow()
+        self.ui.setupUi(self.MainWindow)
+
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        layout = QVBoxLayout()
+        layout.addWidget(self.canvas)
+        self.ui.frame_2.setLayout(layout)
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_xlim(0, depth.x_max)
+        self.ax.set_ylim(0, depth.y_max)
+
+        # One persistent line per channel, updated in place with set_data
+        self.lines = {}
+        for color in ["Red", "Green", "Blue"]:
+            self.lines[color], = self.ax.plot([], [], 'o-', color=color, label=color)
+
+        # Everything except the active channel, captured after each full draw for blitting
+        self.background = None
+
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+        self.canvas.mpl_connect("button_press_event", self.on_click)
+        self.canvas.mpl_connect("button_release_event", self.on_release)
+        self.canvas.mpl_connect("motion_notify_event", self.on_motion)
+
+        self.ui.pushButton.clicked.connect(lambda: self.change_active_color("Red"))
+        self.ui.pushButton_2.clicked.connect(lambda: self.change_active_color("Green"))
+        self.ui.pushButton_3.clicked.connect(lambda: self.change_active_color("Blue"))
+        self.ui.pushButton_4.clicked.connect(self.reset_plot)
+        self.ui.pushButton_5.clicked.connect(self.export_points)
+        self.ui.pushButton_6.clicked.connect(self.save_gradient_image)
+        QShortcut(QKeySequence.Open, self.MainWindow, activated=self.load_points)
+        self.undo_shortcut = QShortcut(QKeySequence.Undo, self.MainWindow, activated=self.undo)
+        self.redo_shortcuts = [QShortcut(QKeySequence.Redo, self.MainWindow, activated=self.redo),
+                               QShortcut(QKeySequence("Ctrl+Y"), self.MainWindow, activated=self.redo)]
+
+        self.points = PointStore(depth=depth)
+        # Undo steps are recorded once an edit is complete, a whole drag is one step
+        self.history = History(self.points)
+
+        # Lookup table shared by the preview and the image export
+        self.lut = GradientLUT(depth.size, dtype=depth.dtype)
+        # One table cache per depth, so switching between themes of different depths stays cached
+        self.luts = {depth: self.lut}
+        # Live frames coloured with the gradient being edited, see open_stream
+        self.stream = None
+        self.tiles = None
+        # SharedLUTPublisher while View > Publish Shared LUT is checked
+        self.shared = None
+        # SessionRecorder while View > Record Session is checked, and the file it is saved to
+        self.recorder = None
+        self.recording_path = None
+
+        # The preview paints the LUT itself instead of a qlineargradient stylesheet
+        self.preview = GradientPreview(self.ui.frame_3)
+        self.ui.gridLayout_2.replaceWidget(self.ui.label_2, self.preview)
+        self.ui.label_2.hide()
+        self.ui.label_2.deleteLater()
+
+        self.picker = PointPicker(self.ax)
+        self.selected_point = None
+        self.dragging = False
+        self.current_color = "Red"
+
+        # The point table is a view over self.points, so it replaces the generated QTableWidget
+        self.table_model = PointTableModel(self.points)
+        self.table_model.pointsEdited.connect(self.update_from_table)
+        self.table_view = QTableView(self.ui.centralwidget)
+        self.table_view.setStyleSheet(TABLE_STYLE)
+        self.table_view.setModel(self.table_model)
+        self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.ui.gridLayout_3.replaceWidget(self.ui.tableWidget, self.table_view)
+        self.ui.tableWidget.hide()
+        self.ui.tableWidget.deleteLater()
+
+        # Views are refreshed once per frame from their dirty flags, in this order
+        self.scheduler = RenderScheduler(parent=self.MainWindow)
+        self.scheduler.register("lut", self.update_lut)
+        self.scheduler.register("plot", self.update_plot)
+        self.scheduler.register("table", self.update_table)
+        self.scheduler.register("preview", self.update_gradient)
+        self.schedule_refresh()
+        self.scheduler.flush()
+
+        # Stage timing, off unless GRADIENT_PROFILE is set or View > Profile Refresh is checked
+        self.profiler = Profiler()
+        self.readout_timer = QTimer(self.MainWindow)
+        self.readout_timer.setInterval(READOUT_INTERVAL)
+        self.readout_timer.timeout.connect(self.update_readout)
+
+        view_menu = self.MainWindow.menuBar().addMenu("View")
+        # The row of the cursor label has no room left, the readout goes on the right of the menu bar
+        self.profile_readout = QLabel()
+        self.profile_readout.setContentsMargins(0, 0, 8, 0)
+        self.profile_readout.setStyleSheet("color: #000000;")
+        self.profile_readout.setMinimumWidth(
+            self.profile_readout.fontMetrics().boundingRect("000.0/000.0 ms, 0000 ev/s").width() + 8)
+        self.MainWindow.menuBar().setCornerWidget(self.profile_readout)
+        self.profile_action = view_menu.addAction("Profile Refresh")
+        self.profile_action.setCheckable(True)
+        self.profile_action.toggled.connect(self.set_profiling)
+        view_menu.addAction("Save Trace...", self.save_trace)
+        view_menu.addSeparator()
+        view_menu.addAction("Open Stream...", self.open_stream)
+        view_menu.addAction("Open Large Image...", self.open_large_image)
+        self.share_action = view_menu.addAction("Publish Shared LUT")
+        self.share_action.setCheckable(True)
+        self.share_action.toggled.connect(self.set_sharing)
+        QtWidgets.QApplication.instance().aboutToQuit.connect(lambda: self.share_action.setChecked(False))
+        self.record_action = view_menu.addAction("Record Session...")
+        self.record_action.setCheckable(True)
+        self.record_action.toggled.connect(self.set_recording)
+        # A session still being recorded is saved on quit
+        QtWidgets.QApplication.instance().aboutToQuit.connect(lambda: self.record_action.setChecked(False))
+        view_menu.addSeparator()
+        self.depth_actions = {}
+        for title, bits_choices, field in (("Input Bits", INPUT_BITS, "input_bits"),
+                                           ("Output Bits", OUTPUT_BITS, "output_bits")):
+            menu = view_menu.addMenu(title)
+            group = QActionGroup(menu)
+            for bits in bits_choices:
+                action = menu.addAction(f"{bits}-bit")
+                action.setCheckable(True)
+                action.setActionGroup(group)
+                action.triggered.connect(lambda checked, field=field, bits=bits:
+                                         self.set_depth(self.points.depth._replace(**{field: bits})))
+                self.depth_actions[field, bits] = action
+        self.update_depth_actions()
+        self.profile_action.setChecked(profiling_requested())
+        self.set_profiling(self.profile_action.isChecked())
+
+        # Named gradients, see open_theme_library
+        self.themes = None
+        self.theme_list = None
+        theme_menu = self.MainWindow.menuBar().addMenu("Themes")
+        theme_menu.addAction("Open Library...", self.open_theme_library)
+        self.save_theme_action = theme_menu.addAction("Save to Library...", self.save_theme)
+        self.save_theme_action.setEnabled(False)
+        theme_menu.addSeparator()
+        theme_menu.addAction("Fit to Colormap...", self.fit_colormap)
+        theme_menu.addAction("Fit to LUT or Image...", self.fit_file)
+
+        self.ui.pushButton.setStyleSheet("""background-color: rgb(255, 0, 0);""")
+
+    def set_profiling(self, enabled):
+        self.profiler.enabled = enabled
+        self.scheduler.profiler = self.profiler if enabled else None
+        self.profile_readout.setVisible(enabled)
+        if enabled:
+            self.readout_timer.start()
+        else:
+            self.readout_timer.stop()
+
+    def update_readout(self):
+        self.profile_readout.setText(self.profiler.summary())
+
+    def open_stream(self):
+        spec, ok = QInputDialog.getText(None, "Open Stream", "Frame files (glob), pipe:PATH or socket:ADDRESS:")
+        if not ok or not spec:
+            return
+        shape, ok = QInputDialog.getText(None, "Open Stream", "Frame size of raw frames (Height x Width):")
+        if not ok:
+            return
+
+        # Only needed once a stream is opened, so Qt-only users never import it
+        from stream_viewer import StreamViewer, open_source
+        try:
+            source = open_source(spec, tuple(int(v) for v in shape.lower().split("x")) if shape else None)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(None, "Open Stream", str(e))
+            return
+
+        if self.stream is not None:
+            # The old dock is destroyed later, its viewer must not keep decoding until then
+            self.stream.pipeline.stop()
+            self.stream.parent().close()
+        self.stream = viewer = StreamViewer(source, self.lut.table(self.points), self.lut.key)
+        dock = QDockWidget("Stream", self.MainWindow)
+        dock.setAttribute(Qt.WA_DeleteOnClose)
+        dock.setWidget(viewer)
+        dock.destroyed.connect(lambda _=None, viewer=viewer: self.stream_closed(viewer))
+        self.MainWindow.addDockWidget(Qt.RightDockWidgetArea, dock)
+
+    def stream_closed(self, viewer):
+        # Called for the viewer of the destroyed dock, which may already have been replaced
+        viewer.pipeline.stop()
+        if self.stream is viewer:
+            self.stream = None
+
+    def open_large_image(self):
+        file_path, _ = QFileDialog.getOpenFileName(None, "Open Large Image", "", "Images (*.npy *.u16 *.raw)")
+        if not file_path:
+            return
+        shape = None
+        if not file_path.lower().endswith(".npy"):
+            shape, ok = QInputDialog.getText(None, "Open Large Image", "Image size (Height x Width):")
+            if not ok or not shape:
+                return
+
+        from tile_viewer import TileViewer, open_image, parse_shape
+        try:
+            image = open_image(file_path, parse_shape(shape))
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(None, "Open Large Image", str(e))
+            return
+
+        if self.tiles is not None:
+            self.tiles.parent().close()
+        self.tiles = viewer = TileViewer(image, self.lut.table(self.points), (self.points.depth, self.lut.key))
+        dock = QDockWidget(os.path.basename(file_path), self.MainWindow)
+        dock.setAttribute(Qt.WA_DeleteOnClose)
+        dock.setWidget(viewer)
+        dock.destroyed.connect(lambda _=None, viewer=viewer: self.tiles_closed(viewer))
+        self.MainWindow.addDockWidget(Qt.RightDockWidgetArea, dock)
+
+    def set_sharing(self, enabled, name=None):
+        # Publishes every LUT update into a shared memory block for other processes, see shared_lut.py
+        if not enabled:
+            if self.shared is not None:
+                self.shared.close()
+                self.shared = None
+            return
+        if self.shared is not None:
+            return
+
+        from shared_lut import SHARED_NAME, SharedLUTPublisher
+        try:
+            self.shared = SharedLUTPublisher(name or SHARED_NAME)
+        except (OSError, RuntimeError, ValueError) as e:
+            QMessageBox.warning(None, "Publish Shared LUT", str(e))
+            self.share_action.setChecked(False)
+            return
+        self.share_action.setChecked(True)
+        self.publish_shared(self.lut.table(self.points))
+
+    def publish_shared(self, table):
+        # More points than the block holds stop the sharing, readers never get a cut gradient
+        try:
+            self.shared.publish(table, self.points.snapshot(), self.points.depth)
+        except ValueError as e:
+            self.share_action.setChecked(False)
+            QMessageBox.warning(None, "Publish Shared LUT", str(e))
+
+    def set_recording(self, enabled, path=None):
+        # Records the mouse and table input for replay.py until unchecked, then saves it
+        if not enabled:
+            if self.recorder is not None:
+                recorder, self.recorder = self.recorder, None
+                try:
+                    recorder.save(self.recording_path)
+                except OSError as e:
+                    QMessageBox.warning(None, "Record Session", str(e))
+            return
+        if self.recorder is not None:
+            return
+
+        if not path:
+            path, _ = QFileDialog.getSaveFileName(None, "Record Session", "", "Sessions (*.npz)")
+            if not path:
+                self.record_action.setChecked(False)
+                return
+        from replay import SessionRecorder
+        self.recording_path = path
+        self.recorder = SessionRecorder(self)
+        self.record_action.setChecked(True)
+
+    def tiles_closed(self, viewer):
+        # The destroyed dock's viewer may already have been replaced by a newer one
+        if self.tiles is viewer:
+            self.tiles = None
+
+    def save_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(None, "Save Trace", "", "Chrome Trace (*.json)")
+
+        if file_path:
+            self.profiler.dump_trace(file_path)
+
+    def schedule_refresh(self, plot=FULL, table=FULL):
+        # Mark every view that depends on the points; table=None when the table is already current
+        self.scheduler.mark("lut")
+        self.scheduler.mark("plot", plot)
+        if table is not None:
+            self.scheduler.mark("table", table)
+        self.scheduler.mark("preview")
+
+    def reset_plot(self):
+        self.selected_point = None
+        self.dragging = False
+        self.current_color = "Red"
+
+        self.points.reset()
+        self.history.checkpoint()
+        self.schedule_refresh()
+
+    def change_active_color(self, color):
+        self.current_color = color
+        self.scheduler.mark("plot")
+
+        if color == "Red":
+            self.ui.pushButton.setStyleSheet("""background-color: rgb(255, 0, 0);""")
+            self.ui.pushButton_2.setStyleSheet("")
+            self.ui.pushButton_3.setStyleSheet("")
+        elif color == "Green":
+            self.ui.pushButton.setStyleSheet("")
+            self.ui.pushButton_2.setStyleSheet("""background-color: rgb(0, 128, 0);""")
+            self.ui.pushButton_3.setStyleSheet("")
+        elif color == "Blue":
+            self.ui.pushButton.setStyleSheet("")
+            self.ui.pushButton_2.setStyleSheet("")
+            self.ui.pushButton_3.setStyleSheet("""background-color: rgb(4, 4, 255);""")
+
+    def on_click(self, event):
+        if event.inaxes != self.ax:
+            return
+
+        x, y = int(event.xdata), int(event.ydata)
+        channel = self.points[self.current_color]
+        hit = self.picker.pick(self.current_color, channel, event.x, event.y)
+
+        if event.button == 1:  # Left click
+            if hit is not None:
+                # The index stays valid for the whole drag since only y changes
+                self.selected_point = hit
+                self.dragging = True
+                # Pace refreshes to the display while the drag lasts
+                self.scheduler.set_interval(FRAME_INTERVAL)
+
+        elif event.button == 3:  # Right click
+            if hit is not None:
+                if len(channel) > 2:
+                    channel.pop(hit)
+                    self.history.checkpoint()
+                    self.schedule_refresh()
+            elif len(channel) < 20:
+                # Add the new point in all the color channels, each keeps itself sorted
+                for color in ["Red", "Green", "Blue"]:
+                    self.points[color].insert(x, y)
+
+                self.history.checkpoint()
+                self.schedule_refresh()
+
+    def on_release(self, event):
+        if self.dragging:
+            self.history.checkpoint()
+        self.dragging = False
+        self.selected_point = None
+        self.scheduler.set_interval(0)
+
+    def on_motion(self, event):
+        self.profiler.event()
+
+        if event.xdata:
+            x, y = int(event.xdata), int(event.ydata)
+            self.ui.label.setText(f"Cursor: ({x}, {y})")
+
+        if event.inaxes != self.ax or self.selected_point is None:
+            return
+
+        else:
+            new_y = np.clip(int(event.ydata), 0, self.points.depth.y_max)
+
+            row = self.selected_point
+            self.points[self.current_color].set_y(row, new_y)
+
+            self.schedule_refresh(plot=self.current_color, table=(self.current_color, row))
+
+    def on_draw(self, event):
+        # A full draw (first show, resize, update_graph) leaves out the animated active line
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.lines[self.current_color])
+
+    def update_plot(self, changes):
+        # Only the active channel moved during a drag: blit it instead of drawing everything
+        if changes == {self.current_color}:
+            self.update_active_line()
+        else:
+            self.update_graph()
+
+    def update_graph(self):
+        for color in ["Red", "Green", "Blue"]:
+            self.lines[color].set_data(*zip(*self.points[color]))
+            self.lines[color].set_animated(color == self.current_color)
+
+        self.canvas.draw()
+
+    def update_active_line(self):
+        line = self.lines[self.current_color]
+        line.set_data(*zip(*self.points[self.current_color]))
+
+        if self.background is None:
+            self.update_graph()
+            return
+
+        # Redraw only the active channel over the cached axes, grid and other channels
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(line)
+        self.canvas.blit(self.ax.bbox)
+
+    def update_table(self, changes=(FULL,)):
+        if FULL in changes:
+            self.table_model.refresh()
+            return
+        for color, row in changes:
+            self.table_model.point_changed(color, row)
+
+    def update_lut(self, changes=(FULL,)):
+        # Rebuild the cached table now so the preview, exports and colorize() find it ready
+        table = self.lut.table(self.points)
+        if self.stream is not None:
+            self.stream.set_lut(table, self.lut.key)
+        if self.shared is not None:
+            self.publish_shared(table)
+        if self.tiles is not None:
+            # Only the tiles in view are recoloured, when the dock next paints
+            self.tiles.set_lut(table, (self.points.depth, self.lut.key))
+
+    def update_gradient(self, changes=(FULL,)):
+        # The preview ignores point sets it has already painted; it shows 8 bits of a 16-bit table
+        self.preview.set_lut(to_8bit(self.lut.table(self.points)), (self.points.depth, self.lut.key))
+
+    def colorize(self, values, out=None, alpha=False):
+        # Colour input data (up to the configured input bits) with the gradient currently being edited
+        return colorize(values, self.lut.table(self.points), out=out, alpha=alpha)
+
+    def save_gradient_image(self):
+
+        # Show the dialog to save the file
+        options = QFileDialog.Options()
+        file_name, file_filter = QFileDialog.getSaveFileName(None, "Save Gradient", "", ";;".join(IMAGE_FILTERS),
+                                                             options=options)
+
+        if file_name:
+            # Native width: one pixel per LUT entry
+            size, ok = QInputDialog.getText(None, "Gradient Size", "Width x Height:",
+                                            text=f"{self.points.depth.size}x{EXPORT_HEIGHT}")
+            if not ok:
+                return
+            try:
+                width, height = (int(v) for v in size.lower().split("x"))
+                export_gradient_image(file_name, self.lut.table(self.points), width, height,
+                                      bit_depth=IMAGE_FILTERS[file_filter])
+            except ValueError as e:
+                QMessageBox.warning(None, "Export Gradient", str(e))
+
+    def export_graph(self):
+
+        # Create a new figure for the graph
+        fig = Figure()
+        canvas = FigureCanvas(fig)
+        ax = fig.add_subplot(111)
+
+        ax.set_xlim(0, self.points.depth.x_max)
+        ax.set_ylim(0, self.points.depth.y_max)
+        for color in ["Red", "Green", "Blue"]:
+            x, y = zip(*self.points[color])
+            ax.plot(x, y, 'o-', color=color, label=color)
+
+        canvas.draw()
+
+        # Set the title and legend
+        ax.set_title('Piecewise Linear Gradient')
+        ax.legend()
+
+        # Show the dialog to save the file
+        options = QFileDialog.Options()
+        file_name, _ = QFileDialog.getSaveFileName(None, "Save Graph", "", "PNG Files (*.png);;All Files (*)",
+                                                   options=options)
+
+        if file_name:
+            # Save the graph as a PNG image
+            canvas.print_figure(file_name, dpi=100)
+
+    def update_from_table(self, color, row):
+        # The model has already written the edit into self.points and refreshed its cells
+        self.history.checkpoint()
+        self.schedule_refresh(table=None)
+
+    def export_points(self):
+
+        # Use QFileDialog to prompt user for save file location and name
+        file_path, file_filter = QFileDialog.getSaveFileName(None, "Save File", "", POINT_FILTERS)
+
+        if file_path:
+            # The format follows the chosen filter when the name has no extension of its own
+            if not os.path.splitext(file_path)[1]:
+                file_path += file_filter[file_filter.index("*") + 1:-1]
+            try:
+                write_lut(file_path, self.lut.table(self.points), self.points.snapshot())
+            except ValueError as e:
+                QMessageBox.warning(None, "Export Points", str(e))
+
+    def load_points(self):
+        file_path, _ = QFileDialog.getOpenFileName(None, "Open Points", "", "Text Files (*.txt)")
+
+        if file_path:
+            try:
+                points = read_points(file_path)
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(None, "Open Points", str(e))
+                return
+            # Widen the domain if the file was made for a higher bit depth
+            depth = self.points.depth
+            needed = depth_for_points(points)
+            self.set_points(points, BitDepth(max(depth.input_bits, needed.input_bits),
+                                             max(depth.output_bits, needed.output_bits)))
+
+    def set_points(self, points, depth):
+        # Replaces the whole gradient, e.g. with a loaded file or a theme, as one undo step in the same domain
+        self.selected_point = None
+        self.dragging = False
+        new_domain = depth != self.points.depth
+        self.set_depth(depth, rescale=False)
+        for color in CHANNELS:
+            self.points[color] = points[color]
+        if new_domain:
+            # The steps before were taken in the old domain, the new points start the history
+            self.history.clear()
+        else:
+            self.history.checkpoint()
+        self.schedule_refresh()
+
+    def open_theme_library(self, path=None):
+        if not path:
+            path = QFileDialog.getExistingDirectory(None, "Open Theme Library")
+            if not path:
+                return
+
+        from themes import ThemeStore
+        self.themes = ThemeStore(path)
+        if self.theme_list is None:
+            self.theme_list = QListWidget()
+            self.theme_list.itemActivated.connect(lambda item: self.switch_theme(item.text()))
+            dock = QDockWidget("Themes", self.MainWindow)
+            dock.setWidget(self.theme_list)
+            self.MainWindow.addDockWidget(Qt.LeftDockWidgetArea, dock)
+        self.theme_list.clear()
+        self.theme_list.addItems(self.themes.names())
+        self.save_theme_action.setEnabled(True)
+
+    def switch_theme(self, name):
+        # Only the manifest is loaded up front, the theme's points are read on first use
+        try:
+            points = self.themes.points(name)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(None, "Themes", str(e))
+            return
+        self.set_points(points, self.themes.depth(name))
+
+    def save_theme(self):
+        name, ok = QInputDialog.getText(None, "Save Theme", "Theme name:")
+        if not ok or not name:
+            return
+        self.themes.save(name, self.points.snapshot(), self.points.depth)
+        self.theme_list.clear()
+        self.theme_list.addItems(self.themes.names())
+
+    def fit_colormap(self):
+        from matplotlib import pyplot
+        names = sorted((name for name in pyplot.colormaps() if not name.endswith("_r")), key=str.lower)
+        name, ok = QInputDialog.getItem(None, "Fit to Colormap", "Colormap:", names,
+                                        names.index("viridis") if "viridis" in names else 0)
+        if ok and name:
+            self.fit_gradient(name)
+
+    def fit_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            None, "Fit to LUT or Image", "",
+            "LUTs and Images (*.npy *.raw *.h *.cube *.csv *.txt *.png *.jpg *.jpeg *.tif *.tiff *.bmp)")
+        if file_path:
+            self.fit_gradient(file_path)
+
+    def fit_gradient(self, spec):
+        # Replaces the points with the closest ones to a colormap, LUT file or colour strip image
+        from fit import fit_points, load_target
+        depth = self.points.depth
+        try:
+            points = fit_points(load_target(spec, depth), depth)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(None, "Fit Gradient", str(e))
+            return
+        self.set_points(points, depth)
+
+    def set_depth(self, depth, rescale=True):
+        """
+        Switches the input domain and output depth of the gradient.
+
+        With rescale the points keep their place in the graph: x and y are scaled
+        from the old ranges to the new ones.
+        """
+        old = self.points.depth
+        if depth == old:
+            return
+        if rescale:
+            x_scale, y_scale = depth.x_max / old.x_max, depth.y_max / old.y_max
+            for color in CHANNELS:
+                self.points[color] = [(round(x * x_scale), round(y * y_scale)) for x, y in self.points[color]]
+        self.points.depth = depth
+        self.lut = self.luts.setdefault(depth, GradientLUT(depth.size, dtype=depth.dtype))
+        self.ax.set_xlim(0, depth.x_max)
+        self.ax.set_ylim(0, depth.y_max)
+        self.update_depth_actions()
+        # Undo steps of the old domain don't apply to the new one
+        self.history.clear()
+        self.schedule_refresh()
+
+    def update_depth_actions(self):
+        depth = self.points.depth
+        for (field, bits), action in self.depth_actions.items():
+            action.setChecked(getattr(depth, field) == bits)
+
+    def undo(self):
+        # Not in the middle of a drag, its step isn't recorded until the button is released
+        if not self.dragging and self.history.undo():
+            self.selected_point = None
+            self.schedule_refresh()
+
+    def redo(self):
+        if not self.dragging and self.history.redo():
+            self.selected_point = None
+            self.schedule_refresh()
+
+
+def run(argv=None):
+    argv = sys.argv if argv is None else argv
+    parser = argparse.ArgumentParser(description="Piecewise linear gradient editor.")
+    parser.add_argument("--input-bits", type=int, choices=INPUT_BITS, default=DEFAULT_DEPTH.input_bits)
+    parser.add_argument("--output-bits", type=int, choices=OUTPUT_BITS, default=DEFAULT_DEPTH.output_bits)
+    parser.add_argument("--themes", help="theme library directory to open")
+    parser.add_argument("--share", nargs="?", const="gradient_lut", metavar="NAME",
+                        help="publish the LUT in shared memory (default name: gradient_lut)")
+    parser.add_argument("--record", metavar="PATH", help="record the session for replay.py, saved on quit")
+    # Whatever isn't ours is left for Qt (e.g. -platform)
+    args, qt_args = parser.parse_known_args(argv[1:])
+
+    app = QtWidgets.QApplication(argv[:1] + qt_args)
+    obj = Main(BitDepth(args.input_bits, args.output_bits))
+    if args.themes:
+        obj.open_theme_library(args.themes)
+    if args.share:
+        obj.set_sharing(True, args.share)
+    if args.record:
+        obj.set_recording(True, args.record)
+    obj.MainWindow.show()
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(run())
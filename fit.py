@@ -0,0 +1,424 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+Fits gradient points to a reference: a LUT file, a matplotlib colormap or an
+image of a colour strip.
+
+Every channel gets a piecewise-linear curve of at most MAX_POINTS points: knots
+are inserted greedily by least squares and moved to the best place between
+their neighbours, then the integer points are adjusted on the LUT they actually
+give (rounded heights, truncated values), and the ones it does not need are
+dropped. A LUT written from a few points is fitted back to those points.
+
+Example:
+python fit.py viridis theme.txt
+python fit.py colorbar.png theme.txt --points 12 --output-bits 16
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from lut import CHANNELS, DEFAULT_DEPTH, INPUT_BITS, OUTPUT_BITS, BitDepth, build_lut, evaluate_range
+from lut_stack import MAX_POINTS
+from points_io import read_lut, write_points
+
+# Allowed deviation of the fitted curve, in output levels; fewer points are used when it is met
+MAX_ERROR = 0.5
+# Rounds of moving every knot within its neighbours once the points are placed
+REFINE_PASSES = 3
+# How far a point is moved either way to lower the error of its LUT, in input positions,
+# and the most rounds of doing so for every point
+POLISH_RADIUS = 16
+POLISH_PASSES = 4
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp")
+# LUT formats that do not record their output bits
+UNTYPED_EXTENSIONS = (".raw", ".bin", ".cube")
+
+
+def _resample(values, size):
+    # Linear resampling of (n, 3) rows to (size, 3) over the same range
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == size:
+        return values
+    source = np.linspace(0, size - 1, len(values))
+    return np.stack([np.interp(np.arange(size), source, values[:, c]) for c in range(3)], axis=1)
+
+
+def colormap_target(name, depth=DEFAULT_DEPTH):
+    """
+    Samples a matplotlib colormap (e.g. "viridis") over the input domain.
+
+    Returns:
+    float64 array of shape (depth.size, 3) in 0..depth.y_max
+    """
+    import matplotlib
+    from matplotlib import cm
+
+    colormaps = getattr(matplotlib, "colormaps", None)
+    try:
+        colormap = colormaps[name] if colormaps is not None else cm.get_cmap(name)
+    except (KeyError, ValueError):
+        raise ValueError(f"Unknown colormap {name!r}.")
+    return colormap(np.linspace(0, 1, depth.size))[:, :3] * depth.y_max
+
+
+def strip_target(path, depth=DEFAULT_DEPTH):
+    """
+    Reads a colour strip from an image: a wide image is read left to right, a tall
+    one bottom to top (like a colorbar), averaging across the strip.
+
+    Returns:
+    float64 array of shape (depth.size, 3) in 0..depth.y_max
+    """
+    from matplotlib import image
+
+    pixels = image.imread(path)
+    if pixels.ndim == 2:
+        pixels = np.stack([pixels] * 3, axis=-1)
+    # PNGs are read as floats in 0..1, other formats as integers
+    scale = depth.y_max / (np.iinfo(pixels.dtype).max if pixels.dtype.kind in "ui" else 1.0)
+    pixels = pixels[..., :3].astype(np.float64) * scale
+    if pixels.shape[0] > pixels.shape[1]:
+        row = pixels.mean(axis=1)[::-1]
+    else:
+        row = pixels.mean(axis=0)
+    return _resample(row, depth.size)
+
+
+def lut_target(path, depth=DEFAULT_DEPTH, lut_bits=None):
+    """
+    Reads a LUT in any format read_lut knows, rescaled to the depth.
+
+    Arguments:
+    path -- LUT file
+    depth -- BitDepth of the points to fit
+    lut_bits -- output bits of a .raw or .cube file, which do not record them (default: depth.output_bits)
+
+    Returns:
+    float64 array of shape (depth.size, 3) in 0..depth.y_max
+    """
+    extension = os.path.splitext(path)[1].lower()
+    dtype = None
+    if extension in UNTYPED_EXTENSIONS:
+        dtype = BitDepth(depth.input_bits, lut_bits or depth.output_bits).dtype
+    lut = read_lut(path, dtype)
+    # Read with the wrong dtype, a raw LUT has half or twice the entries of any domain
+    if extension in (".raw", ".bin") and len(lut) not in [1 << bits for bits in INPUT_BITS]:
+        raise ValueError(f"{path} is not a LUT of {dtype.itemsize * 8}-bit values "
+                         f"({len(lut)} entries), check its output bits.")
+    return _resample(lut * (depth.y_max / np.iinfo(lut.dtype).max), depth.size)
+
+
+def load_target(spec, depth=DEFAULT_DEPTH, lut_bits=None):
+    # An image or LUT file when it exists, otherwise a colormap name
+    if os.path.exists(spec):
+        if spec.lower().endswith(IMAGE_EXTENSIONS):
+            return strip_target(spec, depth)
+        return lut_target(spec, depth, lut_bits)
+    return colormap_target(spec, depth)
+
+
+def _range_sums(prefix, start, stop):
+    # Sums over [start, stop) of the prefix-summed arrays
+    return [p[stop] - p[start] for p in prefix]
+
+
+def _split_errors(prefix, a, b, ya, yb, p):
+    """
+    Squared error over [a, b] of the best two-segment curve (a, ya) - (p, v) - (b, yb)
+    for every candidate knot p, with v solved in closed form from prefix sums.
+    """
+    a, b, p = (np.asarray(v, dtype=np.float64) for v in (a, b, p))
+    # Left part [a, p]: curve ya + (v - ya) k / L with k = i - a
+    length = p - a
+    s_t, s_ti, s_tt = _range_sums(prefix, a.astype(np.intp), p.astype(np.intp) + 1)
+    k1 = length * (length + 1) / 2
+    k2 = length * (length + 1) * (2 * length + 1) / 6
+    dk = (s_ti - a * s_t - ya * k1) / length
+    dd = s_tt - 2 * ya * s_t + ya ** 2 * (length + 1)
+    g = k2 / length ** 2
+    c = dk + ya * g
+    e = dd + 2 * ya * dk + ya ** 2 * g
+
+    # Right part (p, b]: curve yb + (v - yb) k / R with k = b - i
+    length = b - p
+    s_t, s_ti, s_tt = _range_sums(prefix, p.astype(np.intp) + 1, b.astype(np.intp) + 1)
+    k1 = (length - 1) * length / 2
+    k2 = (length - 1) * length * (2 * length - 1) / 6
+    dk = (b * s_t - s_ti - yb * k1) / length
+    dd = s_tt - 2 * yb * s_t + yb ** 2 * length
+    right_g = k2 / length ** 2
+    g = g + right_g
+    c = c + dk + yb * right_g
+    e = e + dd + 2 * yb * dk + yb ** 2 * right_g
+    return e - c ** 2 / g
+
+
+def _solve(prefix, knots):
+    """
+    Least-squares heights of the knots. The curve is linear in them (one hat function
+    per knot), so the normal equations are tridiagonal and their sums come from the
+    prefix sums, without touching the samples.
+
+    Returns:
+    Tuple (heights, total squared error)
+    """
+    x1 = knots[:-1]
+    length = np.diff(knots)
+    # Segment j covers [x1, x2); the last sample is added on its own below
+    s_t, s_ti, _ = _range_sums(prefix, x1.astype(np.intp), knots[1:].astype(np.intp))
+    s_tu = (s_ti - x1 * s_t) / length
+    outer = length * (length + 1) * (2 * length + 1) / (6 * length ** 2)
+    inner = (length - 1) * length * (2 * length - 1) / (6 * length ** 2)
+    cross = (length * length * (length - 1) / 2 - (length - 1) * length * (2 * length - 1) / 6) / length ** 2
+
+    count = len(knots)
+    matrix = np.zeros((count, count))
+    index = np.arange(count - 1)
+    matrix[index, index] += outer
+    matrix[index + 1, index + 1] += inner
+    matrix[index, index + 1] = matrix[index + 1, index] = cross
+    matrix[-1, -1] += 1
+    rhs = np.zeros(count)
+    rhs[:-1] += s_t - s_tu
+    rhs[1:] += s_tu
+    rhs[-1] += prefix[0][-1] - prefix[0][-2]
+
+    heights = np.linalg.solve(matrix, rhs)
+    total = prefix[2][-1] - 2 * heights @ rhs + heights @ matrix @ heights
+    return heights, float(total)
+
+
+def _channel_score(knots, heights, target, depth):
+    """
+    The best integer points on the knots and how far their LUT is from the target.
+
+    Two sets of heights are tried: the least-squares ones rounded, and the target's
+    own values at the knots, which are exact when the target is a LUT whose
+    breakpoints are among the knots.
+
+    Returns:
+    Tuple (points, (max error, squared error)), the errors of the LUT as build_lut
+    gives it (truncated and clipped) in output levels
+    """
+    best = None
+    for values in (np.round(heights), target[knots.astype(np.intp)]):
+        points = [(int(x), int(y)) for x, y in zip(knots, np.clip(values, 0, depth.y_max))]
+        difference = np.clip(evaluate_range(points, depth.size), 0, depth.y_max) - target
+        score = (float(np.abs(difference).max()), float(difference @ difference))
+        if best is None or score < best[1]:
+            best = points, score
+    return best
+
+
+def _refine(prefix, knots, heights, total):
+    # Moves every knot to the best place between its neighbours, a few rounds or until none moves
+    for _ in range(REFINE_PASSES):
+        moved = False
+        for j in range(1, len(knots) - 1):
+            a, b = knots[j - 1], knots[j + 1]
+            if b - a < 2:
+                continue
+            candidates = np.arange(a + 1, b)
+            best = candidates[np.argmin(_split_errors(prefix, a, b, heights[j - 1], heights[j + 1], candidates))]
+            if best == knots[j]:
+                continue
+            trial = knots.copy()
+            trial[j] = best
+            trial_heights, trial_total = _solve(prefix, trial)
+            if trial_total < total:
+                knots, heights, total, moved = trial, trial_heights, trial_total, True
+        if not moved:
+            break
+    return knots, heights, total
+
+
+def _polish(points, target, depth):
+    """
+    Improves integer points on the LUT they give: each point is moved within
+    POLISH_RADIUS and to the height, around the target's, that brings the LUT
+    closest to the target, and inner points whose removal does not raise the max
+    error are dropped, for up to POLISH_PASSES rounds. A point only affects the LUT
+    between its neighbours, so the trials of one point evaluate that span alone,
+    all at once.
+    """
+    points = list(points)
+    positions = np.arange(len(target), dtype=np.float64)
+    difference = np.clip(evaluate_range(points, depth.size), 0, depth.y_max) - target
+    squared = float(difference @ difference)
+
+    def line(x1, y1, x2, y2, x):
+        # The same arithmetic as evaluate_range, so the values match the LUT's exactly
+        m = (y2 - y1) / (x2 - x1)
+        b = y1 - m * x1
+        return m * x + b
+
+    for _ in range(POLISH_PASSES):
+        changed = False
+        j = 0
+        while j < len(points):
+            x, y = points[j]
+            left = points[j - 1] if j > 0 else None
+            right = points[j + 1] if j < len(points) - 1 else None
+            start = left[0] if left else x
+            stop = right[0] if right else x
+            # The span's first position belongs to the segment before it, except at 0
+            lo = start if j <= 1 else start + 1
+            span = positions[lo:stop + 1]
+            expected = target[lo:stop + 1]
+            outside = max(np.abs(difference[:lo]).max(initial=0), np.abs(difference[stop + 1:]).max(initial=0))
+            local = difference[lo:stop + 1]
+            rest = squared - float(local @ local)
+            score = (max(outside, np.abs(local).max(initial=0)), squared)
+
+            if left and right:
+                values = np.clip(np.trunc(line(left[0], left[1], right[0], right[1], span)), 0, depth.y_max) - expected
+                if max(outside, np.abs(values).max()) <= score[0]:
+                    del points[j]
+                    difference[lo:stop + 1] = values
+                    squared, changed = rest + float(values @ values), True
+                    continue
+                places = np.arange(max(x - POLISH_RADIUS, start + 1), min(x + POLISH_RADIUS, stop - 1) + 1)
+            else:
+                places = np.array([x])
+            # Every place with the two heights around the target's
+            levels = target[places] + 0.5
+            trials = np.concatenate([np.column_stack((places, np.floor(levels))),
+                                     np.column_stack((places, np.ceil(levels)))])
+            trials = trials[(trials[:, 1] >= 0) & (trials[:, 1] <= depth.y_max)
+                            & ((trials[:, 0] != x) | (trials[:, 1] != y))]
+            if len(trials) == 0:
+                j += 1
+                continue
+            tx, ty = trials[:, :1], trials[:, 1:]
+            if left and right:
+                values = np.where(span <= tx, line(float(left[0]), float(left[1]), tx, ty, span),
+                                  line(tx, ty, float(right[0]), float(right[1]), span))
+            elif left:
+                values = line(float(left[0]), float(left[1]), tx, ty, span)
+            else:
+                values = line(tx, ty, float(right[0]), float(right[1]), span)
+            values = np.clip(np.trunc(values), 0, depth.y_max) - expected
+            errors = np.maximum(outside, np.abs(values).max(axis=1))
+            sums = rest + np.einsum("ij,ij->i", values, values)
+            best = np.lexsort((sums, errors))[0]
+            # The squared errors are running sums, a trial must beat them by more than their rounding
+            if errors[best] < score[0] or errors[best] == score[0] and sums[best] < squared * (1 - 1e-9):
+                points[j] = (int(tx[best, 0]), int(ty[best, 0]))
+                difference[lo:stop + 1] = values[best]
+                squared, changed = float(sums[best]), True
+            j += 1
+        if not changed:
+            break
+    return points
+
+
+def fit_channel(target, depth=DEFAULT_DEPTH, max_points=MAX_POINTS, max_error=MAX_ERROR):
+    """
+    Fits one channel.
+
+    Knots are placed by least squares, but the error that counts is the one of the
+    LUT the points give (integer heights, truncated values): the knots are added
+    until that error is at most max_error, and only as many as it took to reach
+    the lowest one are kept. Then the points are moved and the ones whose removal
+    does not raise that error dropped (see _polish), so a target that is the LUT
+    of a few points gets those points back.
+
+    Arguments:
+    target -- values at 0..depth.size - 1 in 0..depth.y_max
+    depth -- BitDepth of the points
+    max_points -- most points of the curve
+    max_error -- allowed deviation in output levels
+
+    Returns:
+    list of integer (x, y) tuples
+    """
+    target = np.asarray(target, dtype=np.float64)
+    positions = np.arange(len(target), dtype=np.float64)
+    # The LUT truncates, so the curve is fitted half a level up
+    fitted = target + 0.5
+    prefix = [np.concatenate(([0.0], np.cumsum(v))) for v in (fitted, fitted * positions, fitted * fitted)]
+    knots = np.array([0.0, len(target) - 1.0])
+    heights, total = _solve(prefix, knots)
+    best_knots, best_heights, best_total = knots, heights, total
+    best_score = _channel_score(knots, heights, target, depth)[1]
+
+    while len(knots) < max_points and best_score[0] > max_error:
+        # Every free position as the new knot of the segment it falls in
+        residual = fitted - np.interp(positions, knots, heights)
+        candidates = np.setdiff1d(positions, knots)
+        segment = np.searchsorted(knots, candidates) - 1
+        after = _split_errors(prefix, knots[segment], knots[segment + 1], heights[segment],
+                              heights[segment + 1], candidates)
+        squared = np.concatenate(([0.0], np.cumsum(residual ** 2)))
+        before = squared[knots[segment + 1].astype(np.intp) + 1] - squared[knots[segment].astype(np.intp)]
+        knots = np.sort(np.append(knots, candidates[np.argmax(before - after)]))
+        heights, total = _solve(prefix, knots)
+        score = _channel_score(knots, heights, target, depth)[1]
+        if score[0] < best_score[0]:
+            best_knots, best_heights, best_total, best_score = knots, heights, total, score
+
+    knots, heights, _ = _refine(prefix, best_knots, best_heights, best_total)
+    return _polish(_channel_score(knots, heights, target, depth)[0], target, depth)
+
+
+def fit_points(target, depth=DEFAULT_DEPTH, max_points=MAX_POINTS, max_error=MAX_ERROR):
+    """
+    Fits gradient points to a reference.
+
+    Arguments:
+    target -- array of shape (depth.size, 3) in 0..depth.y_max, e.g. from load_target
+    depth -- BitDepth of the points
+    max_points -- most points per channel
+    max_error -- allowed deviation in output levels, fewer points are used when it is met
+
+    Returns:
+    dict of lists of integer (x, y) tuples keyed by "Red", "Green" and "Blue"
+    """
+    target = np.asarray(target, dtype=np.float64)
+    if target.shape != (depth.size, 3):
+        raise ValueError(f"Expected a target of shape {(depth.size, 3)}, got {target.shape}.")
+    return {color: fit_channel(target[:, channel], depth, max_points, max_error)
+            for channel, color in enumerate(CHANNELS)}
+
+
+def fit_errors(points, target, depth=DEFAULT_DEPTH):
+    # Max and RMS difference between the LUT of the points and the target, in output levels
+    lut = build_lut(*(points[color] for color in CHANNELS), size=depth.size, dtype=depth.dtype)
+    difference = lut - np.asarray(target, dtype=np.float64)
+    return float(np.abs(difference).max()), float(np.sqrt(np.mean(difference ** 2)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit gradient points to a colormap, LUT or colour strip image.")
+    parser.add_argument("target", help="matplotlib colormap name, LUT file (.npy .raw .h .cube .csv .txt) or image")
+    parser.add_argument("output", help="points file to write")
+    parser.add_argument("--points", type=int, default=MAX_POINTS, help=f"most points per channel (default: {MAX_POINTS})")
+    parser.add_argument("--max-error", type=float, default=MAX_ERROR,
+                        help=f"allowed deviation in output levels (default: {MAX_ERROR})")
+    parser.add_argument("--input-bits", type=int, choices=INPUT_BITS, default=DEFAULT_DEPTH.input_bits)
+    parser.add_argument("--output-bits", type=int, choices=OUTPUT_BITS, default=DEFAULT_DEPTH.output_bits)
+    parser.add_argument("--lut-bits", type=int, choices=OUTPUT_BITS,
+                        help="output bits of a .raw or .cube target (default: --output-bits)")
+    args = parser.parse_args(argv)
+
+    depth = BitDepth(args.input_bits, args.output_bits)
+    try:
+        target = load_target(args.target, depth, args.lut_bits)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    points = fit_points(target, depth, max(args.points, 2), args.max_error)
+    write_points(args.output, points)
+    max_error, rms = fit_errors(points, target, depth)
+    counts = ", ".join(f"{len(points[color])} {color.lower()}" for color in CHANNELS)
+    print(f"{counts} points, max error {max_error:.2f}, RMS {rms:.2f} levels")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+from collections import deque
+
+from lut import CHANNELS
+
+# Undo steps kept before the oldest ones are dropped
+HISTORY_LIMIT = 100
+
+
+class Snapshot:
+    """
+    An immutable copy of the red, green and blue points.
+
+    Each channel is a tuple of (x, y) tuples. A channel that didn't change since the
+    previous snapshot reuses that snapshot's tuple instead of copying it, so a step
+    that edits one channel only costs that channel.
+
+    Snapshots compare and hash like the tuple of their channels, which is also the key
+    GradientLUT uses, so a snapshot can be looked up in any of the gradient caches.
+    Indexing by colour gives the channel, like a PointStore.
+    """
+
+    __slots__ = ("channels", "versions", "_hash")
+
+    def __init__(self, channels, versions=None):
+        # tuple() of a tuple is the same object, so shared channels stay shared
+        self.channels = tuple(tuple(channel) for channel in channels)
+        # The store versions the channels were taken at, to detect unchanged channels
+        self.versions = versions or (None,) * len(CHANNELS)
+        self._hash = hash(self.channels)
+
+    @classmethod
+    def capture(cls, store, previous=None):
+        channels = []
+        versions = []
+        for i, color in enumerate(CHANNELS):
+            channel = store[color]
+            if previous is not None and previous.versions[i] == channel.version:
+                channels.append(previous.channels[i])
+            else:
+                channels.append(tuple(channel))
+            versions.append(channel.version)
+        return cls(channels, tuple(versions))
+
+    def __getitem__(self, color):
+        return self.channels[CHANNELS.index(color)]
+
+    def __eq__(self, other):
+        if isinstance(other, Snapshot):
+            return self._hash == other._hash and self.channels == other.channels
+        return self.channels == other
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return f"Snapshot({dict(zip(CHANNELS, self.channels))})"
+
+    def restore(self, store):
+        """
+        Writes the snapshot back into a PointStore, leaving equal channels untouched.
+
+        Returns:
+        The snapshot re-tagged with the store's new channel versions
+        """
+        for color, points in zip(CHANNELS, self.channels):
+            if tuple(store[color]) != points:
+                store[color] = points
+        return Snapshot(self.channels, tuple(store[color].version for color in CHANNELS))
+
+
+class History:
+    """
+    Bounded undo/redo over the snapshots of a PointStore.
+
+    checkpoint() is called once an edit is complete; the editor calls it when a drag
+    ends rather than on every motion event, so a whole drag is a single undo step.
+    """
+
+    def __init__(self, store, limit=HISTORY_LIMIT):
+        self.store = store
+        self.current = Snapshot.capture(store)
+        self._undo = deque(maxlen=limit)
+        self._redo = []
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def checkpoint(self):
+        """
+        Records the store's current state as a new step.
+
+        Returns:
+        True if the points changed since the last step
+        """
+        snapshot = Snapshot.capture(self.store, self.current)
+        if snapshot == self.current:
+            self.current = snapshot
+            return False
+        self._undo.append(self.current)
+        self._redo.clear()
+        self.current = snapshot
+        return True
+
+    def undo(self):
+        if not self._undo:
+            return False
+        self._redo.append(self.current)
+        self.current = self._undo.pop().restore(self.store)
+        return True
+
+    def redo(self):
+        if not self._redo:
+            return False
+        self._undo.append(self.current)
+        self.current = self._redo.pop().restore(self.store)
+        return True
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self.current = Snapshot.capture(self.store)
@@ -0,0 +1,51 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+import numpy as np
+
+# Pick radius around a point marker, in screen pixels
+HIT_RADIUS = 10
+
+
+class PointPicker:
+    """
+    Finds the point under the cursor in display pixels, so selection feels the same at any window size.
+
+    The pixel positions of each channel are cached until its points or the axes
+    change. They are sorted by x, so a pick is a binary search plus a distance
+    check on the few points inside the radius.
+    """
+
+    def __init__(self, ax, radius=HIT_RADIUS):
+        self.ax = ax
+        self.radius = radius
+        self._cache = {}
+
+    def _axes_key(self):
+        return self.ax.bbox.bounds, self.ax.get_xlim(), self.ax.get_ylim()
+
+    def pixels(self, color, channel):
+        key = (channel.version, self._axes_key())
+        cached = self._cache.get(color)
+        if cached is None or cached[0] != key:
+            pixels = self.ax.transData.transform(np.asarray(channel, dtype=np.float64).reshape(-1, 2))
+            cached = (key, pixels[:, 0].copy(), pixels[:, 1].copy())
+            self._cache[color] = cached
+        return cached[1], cached[2]
+
+    def pick(self, color, channel, x, y):
+        """
+        Returns the index of the channel point nearest to display position (x, y), or None
+        when no point lies within the pick radius.
+        """
+        radius = self.radius * getattr(self.ax.figure.canvas, "device_pixel_ratio", 1)
+        xs, ys = self.pixels(color, channel)
+        start, stop = np.searchsorted(xs, (x - radius, x + radius), side="left")
+        if start == stop:
+            return None
+
+        distances = (xs[start:stop] - x) ** 2 + (ys[start:stop] - y) ** 2
+        nearest = int(distances.argmin())
+        if distances[nearest] > radius ** 2:
+            return None
+        return start + nearest
@@ -0,0 +1,121 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+Writes the gradient as an image straight from the LUT.
+
+Example:
+python image_export.py theme.txt chart.png --width 4096 --height 4096 --bit-depth 16
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from lut import CHANNELS, INPUT_BITS, OUTPUT_BITS, build_lut, depth_for_points, to_8bit
+from points_io import read_points
+from pngwriter import PNGWriter
+
+# Default image height, the width defaults to one pixel per LUT entry
+EXPORT_HEIGHT = 100
+# Rows handed to the writer at a time
+BLOCK_ROWS = 64
+FORMATS = {".png": "png", ".rgb": "raw", ".raw": "raw"}
+
+
+def gradient_row(lut, width, bit_depth=8):
+    """
+    Samples one image row from the LUT with the nearest entry for every pixel.
+
+    At the native width (one pixel per entry) the row is the LUT itself.
+
+    Arguments:
+    lut -- uint8 or uint16 array of shape (n, 3)
+    width -- row width in pixels
+    bit_depth -- 8 or 16; an 8-bit LUT is scaled to 16 bits exactly (x * 257), a 16-bit one rounded to 8 bits
+
+    Returns:
+    uint8 or uint16 array of shape (width, 3)
+    """
+    if width == len(lut):
+        row = np.asarray(lut)
+    else:
+        index = np.rint(np.arange(width) * ((len(lut) - 1) / max(width - 1, 1))).astype(np.intp)
+        row = lut[index]
+    if bit_depth == 16 and row.dtype == np.uint8:
+        row = row.astype(np.uint16) * 257
+    elif bit_depth == 8:
+        row = to_8bit(row)
+    return row
+
+
+def export_format(path):
+    for extension, fmt in FORMATS.items():
+        if path.lower().endswith(extension):
+            return fmt
+    raise ValueError(f"Unknown image format for {path}; use one of {', '.join(FORMATS)}.")
+
+
+def export_gradient_image(path, lut, width=None, height=EXPORT_HEIGHT, bit_depth=8, fmt=None):
+    """
+    Writes a horizontal gradient image of any size, block of rows by block of rows.
+
+    Only one block of rows is ever in memory, so very large charts don't need a
+    full-size intermediate image.
+
+    Arguments:
+    path -- output file, or a binary file object (then fmt is needed)
+    lut -- uint8 or uint16 array of shape (n, 3)
+    width -- image width (default: one pixel per LUT entry)
+    height -- image height (default: 100)
+    bit_depth -- 8 or 16 bits per channel
+    fmt -- "png" or "raw" (interleaved RGB, 16-bit little-endian); taken from the extension by default
+    """
+    width = len(lut) if width is None else width
+    if width < 1 or height < 1:
+        raise ValueError("The image needs at least one pixel.")
+    if bit_depth not in (8, 16):
+        raise ValueError("The bit depth must be 8 or 16.")
+
+    fmt = export_format(path) if fmt is None else fmt
+    row = gradient_row(lut, width, bit_depth)
+    block = np.broadcast_to(row, (min(BLOCK_ROWS, height),) + row.shape)
+
+    if fmt == "png":
+        with PNGWriter(path, width, height, channels=3, bit_depth=bit_depth) as png:
+            for start in range(0, height, BLOCK_ROWS):
+                png.write_rows(block[:min(BLOCK_ROWS, height - start)])
+    elif fmt == "raw":
+        data = row.astype(row.dtype.newbyteorder("<")).tobytes()
+        f = path if hasattr(path, "write") else open(path, "wb")
+        try:
+            for start in range(0, height, BLOCK_ROWS):
+                f.write(data * min(BLOCK_ROWS, height - start))
+        finally:
+            if f is not path:
+                f.close()
+    else:
+        raise ValueError(f"Unknown image format {fmt!r}.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the gradient of a points file as an image.")
+    parser.add_argument("points", help="points file written by Export Points")
+    parser.add_argument("output", help=".png, or .rgb/.raw for raw interleaved RGB")
+    parser.add_argument("--width", type=int, help="width in pixels (default: one per LUT entry)")
+    parser.add_argument("--height", type=int, default=EXPORT_HEIGHT)
+    parser.add_argument("--bit-depth", type=int, choices=(8, 16), default=8)
+    parser.add_argument("--input-bits", type=int, choices=INPUT_BITS, help="input resolution (default: from the points)")
+    parser.add_argument("--output-bits", type=int, choices=OUTPUT_BITS, help="LUT depth (default: from the points)")
+    args = parser.parse_args(argv)
+
+    points = read_points(args.points)
+    depth = depth_for_points(points, args.input_bits, args.output_bits)
+    lut = build_lut(*(points[color] for color in CHANNELS), size=depth.size, dtype=depth.dtype)
+    export_gradient_image(args.output, lut, args.width, args.height, args.bit_depth)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
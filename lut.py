@@ -0,0 +1,347 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+import functools
+from collections import namedtuple
+
+import numpy as np
+
+from cache import LRUCache
+
+LUT_SIZE = 4096
+CHANNELS = ("Red", "Green", "Blue")
+INPUT_BITS = (10, 12, 14, 16)
+OUTPUT_BITS = (8, 16)
+# Recent point sets whose tables GradientLUT keeps, so undo/redo doesn't rebuild them
+LUT_CACHE_SIZE = 32
+
+
+class BitDepth(namedtuple("BitDepth", ("input_bits", "output_bits"))):
+    """
+    Input resolution (10, 12, 14 or 16 bits) and output depth (8 or 16 bits) of a gradient.
+
+    x runs over 0..x_max, the LUT has size entries, channel values run over 0..y_max
+    and are stored as dtype.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, input_bits=12, output_bits=8):
+        if input_bits not in INPUT_BITS:
+            raise ValueError(f"The input must be {', '.join(map(str, INPUT_BITS))} bits, not {input_bits}.")
+        if output_bits not in OUTPUT_BITS:
+            raise ValueError(f"The output must be 8 or 16 bits, not {output_bits}.")
+        return super().__new__(cls, input_bits, output_bits)
+
+    @property
+    def size(self):
+        return 1 << self.input_bits
+
+    @property
+    def x_max(self):
+        return self.size - 1
+
+    @property
+    def y_max(self):
+        return (1 << self.output_bits) - 1
+
+    @property
+    def dtype(self):
+        return np.dtype(np.uint8 if self.output_bits == 8 else np.uint16)
+
+    def default_points(self):
+        return (0, 0), (self.x_max, self.y_max)
+
+
+DEFAULT_DEPTH = BitDepth()
+
+
+def depth_for_points(points, input_bits=None, output_bits=None):
+    """
+    Guesses the depth of a point set from its largest x and y, e.g. for a loaded points file.
+
+    Arguments:
+    points -- dict of lists of (x, y) tuples keyed by "Red", "Green" and "Blue"
+    input_bits, output_bits -- used instead of the guess when given
+    """
+    if input_bits is None:
+        x = max(x for color in CHANNELS for x, _ in points[color])
+        input_bits = next((bits for bits in INPUT_BITS if x < 1 << bits), INPUT_BITS[-1])
+        input_bits = max(input_bits, DEFAULT_DEPTH.input_bits)
+    if output_bits is None:
+        y = max(y for color in CHANNELS for _, y in points[color])
+        output_bits = 8 if y <= 255 else 16
+    return BitDepth(input_bits, output_bits)
+
+
+def to_8bit(lut):
+    # 16-bit tables scaled to 0..255 with rounding (the exact inverse of x * 257), 8-bit ones as they are
+    if lut.dtype == np.uint8:
+        return lut
+    return ((lut.astype(np.uint32) + 128) // 257).astype(np.uint8)
+
+
+def _segments(points):
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1]
+
+
+def locate_segments(points, x):
+    """
+    Finds the segment of a piecewise-linear channel that contains each x.
+
+    The first segment with x1 <= x <= x2 wins, exactly like the linear scan in
+    calculate_color, so a value sitting on a breakpoint uses the segment on its left.
+
+    Arguments:
+    points -- list of (x, y) tuples for one channel
+    x -- array of positions to look up
+
+    Returns:
+    Tuple (index, x1, y1, x2, y2) of arrays shaped like x; index is -1 where no
+    segment contains the position
+    """
+    x = np.asarray(x, dtype=np.float64)
+    x1, y1, x2, y2 = _segments(points)
+    index = np.full(x.shape, -1, dtype=np.intp)
+
+    if len(x1) == 0:
+        return index, x1, y1, x2, y2
+
+    if np.all(x2 >= x1):
+        # Sorted breakpoints: one binary search for every position
+        xs = np.append(x1, x2[-1])
+        found = np.clip(np.searchsorted(xs, x, side="left") - 1, 0, len(x1) - 1)
+        inside = (x >= xs[0]) & (x <= xs[-1])
+        index[inside] = found[inside]
+        # Zero-width segments never match, calculate_color would divide by zero on them
+        degenerate = inside & (x1[found] == x2[found])
+        index[degenerate] = -1
+    else:
+        # Unsorted points (e.g. typed into the table): keep the first match
+        for i in range(len(x1) - 1, -1, -1):
+            if x1[i] != x2[i]:
+                index[(x1[i] <= x) & (x <= x2[i])] = i
+
+    return index, x1, y1, x2, y2
+
+
+def evaluate_channel(points, x):
+    """
+    Evaluates one channel with the same int(m * x + b) truncation as calculate_color.
+
+    Arguments:
+    points -- list of (x, y) tuples for one channel
+    x -- array of positions
+
+    Returns:
+    int64 array shaped like x, 0 outside the channel's breakpoints
+    """
+    x = np.asarray(x, dtype=np.float64)
+    index, x1, y1, x2, y2 = locate_segments(points, x)
+    values = np.zeros(x.shape, dtype=np.int64)
+    inside = index >= 0
+    if not np.any(inside):
+        return values
+
+    i = index[inside]
+    m = (y2[i] - y1[i]) / (x2[i] - x1[i])
+    b = y1[i] - m * x1[i]
+    values[inside] = np.trunc(m * x[inside] + b)
+    return values
+
+
+def interpolate_channel(points, x):
+    """
+    Evaluates one channel as slope * (x - x1) + y1 without truncation, like calculate_gradient.
+
+    Arguments:
+    points -- list of (x, y) tuples for one channel
+    x -- array of positions
+
+    Returns:
+    float64 array shaped like x, 0 outside the channel's breakpoints
+    """
+    x = np.asarray(x, dtype=np.float64)
+    index, x1, y1, x2, y2 = locate_segments(points, x)
+    values = np.zeros(x.shape, dtype=np.float64)
+    inside = index >= 0
+    if not np.any(inside):
+        return values
+
+    i = index[inside]
+    slopes = (y2[i] - y1[i]) / (x2[i] - x1[i])
+    values[inside] = slopes * (x[inside] - x1[i]) + y1[i]
+    return values
+
+
+def evaluate_range(points, size):
+    """
+    evaluate_channel(points, np.arange(size)) computed one segment at a time.
+
+    Each segment fills its own slice of the table, so building a 65536-entry table
+    costs one multiply-add per entry instead of a binary search. Falls back to
+    evaluate_channel for unsorted points.
+
+    Returns:
+    int64 array of shape (size,)
+    """
+    values = _range_values(points, size)
+    return evaluate_channel(points, np.arange(size)) if values is None else values.astype(np.int64)
+
+
+def _range_values(points, size):
+    # The truncated values of evaluate_range as float64, or None for unsorted points
+    x1, y1, x2, y2 = _segments(points)
+    if len(x1) == 0 or not np.all(x2 >= x1):
+        return None
+
+    x = _positions(size)
+    values = np.zeros(size, dtype=np.float64)
+    # Right to left, so a breakpoint shared by two segments keeps the left one like locate_segments
+    for i in range(len(x1) - 1, -1, -1):
+        if x1[i] == x2[i]:
+            continue
+        lo, hi = max(int(np.ceil(x1[i])), 0), min(int(np.floor(x2[i])), size - 1)
+        if lo > hi:
+            continue
+        m = (y2[i] - y1[i]) / (x2[i] - x1[i])
+        b = y1[i] - m * x1[i]
+        values[lo:hi + 1] = m * x[lo:hi + 1] + b
+    # locate_segments gives the first breakpoint to the first segment, even a zero-width one
+    if x1[0] == x2[0] and x1[0] == int(x1[0]) and 0 <= x1[0] < size:
+        values[int(x1[0])] = 0
+    return np.trunc(values, out=values)
+
+
+@functools.lru_cache(maxsize=4)
+def _positions(size):
+    x = np.arange(size, dtype=np.float64)
+    x.flags.writeable = False
+    return x
+
+
+def build_lut(red_points, green_points, blue_points, size=LUT_SIZE, dtype=np.uint8):
+    """
+    Builds the full lookup table for the three channels in one pass.
+
+    Arguments:
+    red_points, green_points, blue_points -- lists of (x, y) tuples
+    size -- number of entries (default: 4096 for 12-bit input, BitDepth.size in general)
+    dtype -- np.uint8 for 8-bit output, np.uint16 for 16-bit output
+
+    Returns:
+    array of shape (size, 3), values clipped to the range of dtype
+    """
+    lut = np.empty((size, 3), dtype=dtype)
+    for channel, points in enumerate((red_points, green_points, blue_points)):
+        values = _range_values(points, size)
+        if values is None:
+            values = evaluate_channel(points, _positions(size))
+        lut[:, channel] = np.clip(values, 0, np.iinfo(dtype).max, out=values)
+    return lut
+
+
+class SegmentedLUT:
+    """
+    A lookup table kept as its breakpoints and evaluated on demand.
+
+    For domains where the full table is too big for the consumer (a 16-bit input
+    with 16-bit output is 384 KiB per gradient): it stores the segments of each
+    channel (x1, slope, intercept), about 20 per channel, and gives the same values
+    as build_lut for any x. Indexing and len() behave like the full table, so
+    slices of it can be materialised where needed.
+    """
+
+    def __init__(self, red_points, green_points, blue_points, size=LUT_SIZE, dtype=np.uint8):
+        self.size = size
+        self.dtype = np.dtype(dtype)
+        self.shape = (size, 3)
+        self.points = [np.asarray(points, dtype=np.float64).reshape(-1, 2)
+                       for points in (red_points, green_points, blue_points)]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        return self.evaluate(np.arange(self.size)[index])
+
+    @property
+    def nbytes(self):
+        return sum(points.nbytes for points in self.points)
+
+    def evaluate(self, x, out=None):
+        """
+        Colours any array of inputs straight from the breakpoints.
+
+        Returns:
+        array of shape x.shape + (3,) of dtype (written into out when given)
+        """
+        x = np.minimum(np.asarray(x), self.size - 1)
+        if out is None:
+            out = np.empty(x.shape + (3,), dtype=self.dtype)
+        for channel, points in enumerate(self.points):
+            out[..., channel] = np.clip(evaluate_channel(points, x), 0, np.iinfo(self.dtype).max)
+        return out
+
+    def segments(self):
+        """
+        The compact form for firmware: per channel, the segment starts, slopes and intercepts.
+
+        A value x is coloured with int(slope * x + intercept) of the last segment starting at or
+        before x, except that x on a breakpoint uses the segment to its left.
+
+        Returns:
+        list of three (x1, slopes, intercepts) float64 array triples
+        """
+        result = []
+        for points in self.points:
+            x1, y1, x2, y2 = _segments(points)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                slopes = np.where(x2 != x1, (y2 - y1) / (x2 - x1), 0.0)
+            result.append((x1, slopes, y1 - slopes * x1))
+        return result
+
+
+class GradientLUT:
+    """
+    Caches the lookup table of a point set and rebuilds it only when the points change.
+
+    The tables of recent point sets stay in an LRU cache keyed by the points, so
+    returning to an earlier state (undo, redo) is a lookup instead of a rebuild.
+    """
+
+    def __init__(self, size=LUT_SIZE, cache_size=LUT_CACHE_SIZE, dtype=np.uint8):
+        self.size = size
+        self.dtype = dtype
+        self._version = None
+        self._key = None
+        self._table = None
+        self._cache = LRUCache(cache_size)
+
+    @property
+    def key(self):
+        # The points of the last table handed out, as a tuple per channel
+        return self._key
+
+    def table(self, points):
+        """
+        Returns the cached (size, 3) table for a PointStore or a {"Red": [...], ...} dict.
+        The array is read-only since it is shared between callers.
+        """
+        # A PointStore whose version hasn't moved can't have changed
+        version = getattr(points, "version", None)
+        if version is not None and version == self._version:
+            return self._table
+
+        key = tuple(tuple(points[color]) for color in CHANNELS)
+        self._version = version
+        if key != self._key:
+            self._key = key
+            self._table = self._cache.get_or_build(key, lambda: self._build(key))
+        return self._table
+
+    def _build(self, key):
+        table = build_lut(*key, size=self.size, dtype=self.dtype)
+        table.flags.writeable = False
+        return table
@@ -0,0 +1,158 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+Evaluates many gradients at once.
+
+The points of N gradients are packed into padded (N, 3, MAX_POINTS) arrays and
+turned into an (N, size, 3) stack of LUTs, plus the luminance curves of
+calculate_gradient if asked, with NumPy operations over whole blocks of
+gradients instead of a Python call per gradient and channel.
+"""
+
+import numpy as np
+
+from lut import CHANNELS, LUT_SIZE, build_lut, interpolate_channel
+
+# Most points per channel, like the editor allows
+MAX_POINTS = 20
+# Gradients evaluated together; small blocks keep the scratch arrays (under 1 MB each) in cache
+BLOCK_GRADIENTS = 8
+# Gradients with at most this many points in every channel are built one by one: a single
+# segment per channel is quicker for build_lut than the block machinery (crossover at 3 points)
+LOOP_MAX_POINTS = 2
+
+
+def pack_points(gradients, max_points=MAX_POINTS):
+    """
+    Packs point sets into padded arrays.
+
+    Arguments:
+    gradients -- sequence of point sets indexed by "Red", "Green" and "Blue" (dicts, PointStores,
+                 Snapshots) or of (red, green, blue) tuples of point lists
+    max_points -- padded length of every channel
+
+    Returns:
+    Tuple (xs, ys, counts): float64 arrays of shape (N, 3, max_points), padding is +inf for x
+    and 0 for y, and the int array (N, 3) of points per channel
+    """
+    xs = np.full((len(gradients), 3, max_points), np.inf)
+    ys = np.zeros((len(gradients), 3, max_points))
+    counts = np.zeros((len(gradients), 3), dtype=np.intp)
+    for i, gradient in enumerate(gradients):
+        channels = gradient if isinstance(gradient, (tuple, list)) else [gradient[color] for color in CHANNELS]
+        for channel, points in enumerate(channels):
+            points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+            if len(points) > max_points:
+                raise ValueError(f"Gradient {i} has {len(points)} {CHANNELS[channel]} points, at most "
+                                 f"{max_points} fit.")
+            xs[i, channel, :len(points)] = points[:, 0]
+            ys[i, channel, :len(points)] = points[:, 1]
+            counts[i, channel] = len(points)
+    return xs, ys, counts
+
+
+def _luminance(red, green, blue, out):
+    # calculate_gradient's weighting, in the same order so the sums are identical
+    out[...] = 0.2126 * red + 0.7152 * green + 0.0722 * blue
+
+
+def _segment_table(xs, ys, counts):
+    # Per gradient and channel: entry 0 and entries from count - 1 on are an all-zero segment
+    # (outside the breakpoints), entry k + 1 is segment k; zero-width segments are zero too
+    x1, y1 = xs[..., :-1], ys[..., :-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slopes = (ys[..., 1:] - y1) / (xs[..., 1:] - x1)
+        real = (np.arange(xs.shape[-1] - 1) < counts[..., None] - 1) & np.isfinite(slopes)
+        table = np.zeros((4,) + xs.shape[:-1] + (xs.shape[-1] + 1,))
+        table[0, ..., 1:-1] = np.where(real, slopes, 0)
+        # The padding's inf and nan slopes give nan intercepts, replaced by the zero segment
+        table[1, ..., 1:-1] = np.where(real, y1 - slopes * x1, 0)
+    table[2, ..., 1:-1] = np.where(real, x1, 0)
+    table[3, ..., 1:-1] = np.where(real, y1, 0)
+    return table
+
+
+def _evaluate_block(xs, ys, counts, size, dtype, out, luminance):
+    n_blocks, _, max_points = xs.shape
+    x = np.arange(size, dtype=np.float64)[:, None]
+
+    # The segment of x is the number of breakpoints below it minus one, like locate_segments,
+    # with x equal to the first breakpoint in segment 0. Counted here as x >= x0 plus the later
+    # breakpoints below x: a step at ceil(x0) and at floor(xk) + 1, then a running sum that
+    # starts at the row's offset in the flattened segment table, so it indexes the table directly.
+    # Padding (+inf) steps past the end and is never counted.
+    steps = np.zeros((n_blocks, size + 2, 3), dtype=np.int32)
+    where = np.floor(xs) + 1
+    where[..., 0] = np.ceil(xs[..., 0])
+    where = (np.clip(where, 0, size + 1)).astype(np.intp)
+    block, channel = np.indices(xs.shape[:2])
+    np.add.at(steps, (block[..., None], where, channel[..., None]), 1)
+    steps[:, 0] += (np.arange(n_blocks * 3, dtype=np.int32) * (max_points + 1)).reshape(n_blocks, 3)
+    index = np.cumsum(steps[:, :size], axis=1, dtype=np.int32)
+
+    table = _segment_table(xs, ys, counts).reshape(4, -1)
+    values = table[0].take(index)
+    values *= x
+    values += table[1].take(index)
+    np.trunc(values, out=values)
+    np.clip(values, 0, np.iinfo(dtype).max, out=values)
+    out[...] = values
+
+    if luminance is not None:
+        # calculate_gradient's form, slope * (x - x1) + y1 without truncation
+        curves = x - table[2].take(index)
+        curves *= table[0].take(index)
+        curves += table[3].take(index)
+        _luminance(curves[..., 0], curves[..., 1], curves[..., 2], luminance)
+
+
+def build_luts(xs, ys, counts, size=LUT_SIZE, dtype=np.uint8, luminance=False, block_size=BLOCK_GRADIENTS):
+    """
+    Builds the LUTs of many gradients, block by block.
+
+    Gives the same tables as build_lut for every gradient. Gradients whose points are
+    not sorted by x (rare, e.g. typed into the table) or that have no more than
+    LOOP_MAX_POINTS points per channel go through build_lut one by one.
+
+    Arguments:
+    xs, ys, counts -- packed points from pack_points
+    size -- entries per LUT (default: 4096)
+    dtype -- np.uint8 or np.uint16 output
+    luminance -- also return the calculate_gradient curve of every gradient at every x
+    block_size -- gradients evaluated per block
+
+    Returns:
+    array of shape (N, size, 3), or a tuple with the float64 (N, size) luminance curves too
+    """
+    n = len(xs)
+    luts = np.empty((n, size, 3), dtype=dtype)
+    curves = np.empty((n, size)) if luminance else None
+
+    padded = np.where(np.arange(xs.shape[-1]) < counts[..., None], xs, np.inf)
+    with np.errstate(invalid="ignore"):
+        looped = np.any(np.diff(padded, axis=-1) < 0, axis=(1, 2))
+    looped |= counts.max(axis=1, initial=0) <= LOOP_MAX_POINTS
+    batched = np.flatnonzero(~looped)
+    for start in range(0, len(batched), block_size):
+        chosen = batched[start:start + block_size]
+        if chosen[-1] - chosen[0] == len(chosen) - 1:
+            # Consecutive gradients (the usual case) are written straight into the stack
+            chosen = slice(chosen[0], chosen[-1] + 1)
+            _evaluate_block(padded[chosen], ys[chosen], counts[chosen], size, dtype,
+                            luts[chosen], None if curves is None else curves[chosen])
+            continue
+        block_luts = np.empty((len(chosen), size, 3), dtype=dtype)
+        block_curves = None if curves is None else np.empty((len(chosen), size))
+        _evaluate_block(padded[chosen], ys[chosen], counts[chosen], size, dtype, block_luts, block_curves)
+        luts[chosen] = block_luts
+        if curves is not None:
+            curves[chosen] = block_curves
+
+    for i in np.flatnonzero(looped):
+        channels = [list(zip(xs[i, c, :counts[i, c]].tolist(), ys[i, c, :counts[i, c]].tolist())) for c in range(3)]
+        luts[i] = build_lut(*channels, size=size, dtype=dtype)
+        if curves is not None:
+            _luminance(*(interpolate_channel(channel, np.arange(size)) for channel in channels), curves[i])
+
+    return (luts, curves) if luminance else luts
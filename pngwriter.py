@@ -0,0 +1,102 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+import struct
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+COLOR_TYPES = {1: 0, 3: 2, 4: 6}
+# Compressed bytes collected before an IDAT chunk is written
+IDAT_SIZE = 1 << 16
+
+
+class PNGWriter:
+    """
+    Writes a PNG image row block by row block, so the full image never has to be in memory.
+
+    Usage:
+    with PNGWriter(path, width, height, channels=3, bit_depth=8) as png:
+        png.write_rows(rows)  # uint8/uint16 array of shape (n, width, channels)
+
+    path may also be a binary file object (e.g. io.BytesIO), which is left open.
+    """
+
+    def __init__(self, path, width, height, channels=3, bit_depth=8, level=6):
+        if channels not in COLOR_TYPES:
+            raise ValueError("PNG output needs 1, 3 or 4 channels.")
+        if bit_depth not in (8, 16):
+            raise ValueError("PNG output needs a bit depth of 8 or 16.")
+
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.bit_depth = bit_depth
+        self.rows_written = 0
+        self._dtype = np.dtype(">u2") if bit_depth == 16 else np.dtype(np.uint8)
+        self._compressor = zlib.compressobj(level)
+        self._pending = []
+        self._pending_size = 0
+        self._buffer = None
+
+        self._owns_file = not hasattr(path, "write")
+        self._file = open(path, "wb") if self._owns_file else path
+        self._file.write(PNG_SIGNATURE)
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, COLOR_TYPES[channels], 0, 0, 0))
+
+    def _chunk(self, kind, data):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(kind)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)) & 0xFFFFFFFF))
+
+    def _queue(self, data):
+        if data:
+            self._pending.append(data)
+            self._pending_size += len(data)
+        if self._pending_size >= IDAT_SIZE:
+            self._chunk(b"IDAT", b"".join(self._pending))
+            self._pending = []
+            self._pending_size = 0
+
+    def write_rows(self, rows):
+        rows = np.asarray(rows).reshape(-1, self.width * self.channels)
+        if self.rows_written + len(rows) > self.height:
+            raise ValueError("More rows written than the image height.")
+
+        # Every row gets a leading filter byte (0 = no filter); the buffer is reused between calls
+        if self._buffer is None or len(self._buffer) < len(rows):
+            self._buffer = np.zeros((len(rows), 1 + self.width * self.channels * self._dtype.itemsize), np.uint8)
+        framed = self._buffer[:len(rows)]
+        framed[:, 1:].view(self._dtype)[...] = rows
+
+        self._queue(self._compressor.compress(framed.tobytes()))
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"Wrote {self.rows_written} of {self.height} rows.")
+            self._queue(self._compressor.flush())
+            if self._pending:
+                self._chunk(b"IDAT", b"".join(self._pending))
+            self._chunk(b"IEND", b"")
+        finally:
+            self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._file is not None:
+            self._release()
+
+    def _release(self):
+        if self._owns_file:
+            self._file.close()
+        self._file = None
@@ -0,0 +1,176 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+import itertools
+from array import array
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from lut import CHANNELS, DEFAULT_DEPTH
+
+DEFAULT_POINTS = DEFAULT_DEPTH.default_points()
+
+# Shared by every channel, so a version number is never reused, even across stores
+_versions = itertools.count(1)
+
+
+class ChannelPoints:
+    """
+    The sorted breakpoints of one colour channel with cached segment slopes and intercepts.
+
+    Behaves like a list of (x, y) tuples for reading. Every edit bumps version and
+    only recomputes the segments next to the edited point.
+    """
+
+    __slots__ = ("x", "y", "slopes", "intercepts", "version")
+
+    def __init__(self, points=DEFAULT_POINTS):
+        self.x = array("q")
+        self.y = array("q")
+        self.slopes = array("d")
+        self.intercepts = array("d")
+        self.version = 0
+        self.replace(points)
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, index):
+        return self.x[index], self.y[index]
+
+    def __iter__(self):
+        return zip(self.x, self.y)
+
+    def __setitem__(self, index, point):
+        x, y = point
+        index = range(len(self.x))[index]
+        if x != self.x[index]:
+            index = self.move(index, x)
+        self.set_y(index, y)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"ChannelPoints({list(self)})"
+
+    def __array__(self, dtype=None, copy=None):
+        points = np.column_stack((np.frombuffer(self.x, dtype=np.int64), np.frombuffer(self.y, dtype=np.int64)))
+        return points if dtype is None else points.astype(dtype)
+
+    def _bump(self):
+        self.version = next(_versions)
+
+    def _update_segment(self, i):
+        x1, x2 = self.x[i], self.x[i + 1]
+        y1, y2 = self.y[i], self.y[i + 1]
+        # A zero-width segment (two points at the same x) is treated as flat
+        slope = (y2 - y1) / (x2 - x1) if x2 != x1 else 0.0
+        self.slopes[i] = slope
+        self.intercepts[i] = y1 - slope * x1
+
+    def _update_around(self, index):
+        for i in (index - 1, index):
+            if 0 <= i < len(self.slopes):
+                self._update_segment(i)
+
+    def replace(self, points):
+        points = sorted(((int(x), int(y)) for x, y in points), key=lambda p: p[0])
+        self.x = array("q", [x for x, _ in points])
+        self.y = array("q", [y for _, y in points])
+        self.slopes = array("d", [0.0]) * max(len(points) - 1, 0)
+        self.intercepts = array("d", [0.0]) * max(len(points) - 1, 0)
+        for i in range(len(self.slopes)):
+            self._update_segment(i)
+        self._bump()
+
+    def index(self, point):
+        # Binary search on x, then a short scan over points sharing that x
+        x, y = point
+        for i in range(bisect_left(self.x, x), bisect_right(self.x, x)):
+            if self.y[i] == y:
+                return i
+        raise ValueError(f"{point} is not in the channel")
+
+    def _insert_at(self, index, x, y):
+        self.x.insert(index, int(x))
+        self.y.insert(index, int(y))
+        if len(self.x) > 1:
+            segment = min(index, len(self.x) - 2)
+            self.slopes.insert(segment, 0.0)
+            self.intercepts.insert(segment, 0.0)
+        self._update_around(index)
+        self._bump()
+        return index
+
+    def insert(self, x, y):
+        # Like the editor always did: the new point goes before the last one, then into x order
+        index = bisect_right(self.x, x, 0, max(len(self.x) - 1, 0))
+        if self.x and x > self.x[-1]:
+            index = len(self.x)
+        return self._insert_at(index, x, y)
+
+    def pop(self, index):
+        index = range(len(self.x))[index]
+        point = (self.x.pop(index), self.y.pop(index))
+        if self.slopes:
+            segment = min(index, len(self.slopes) - 1)
+            del self.slopes[segment]
+            del self.intercepts[segment]
+        if 0 < index < len(self.x):
+            self._update_segment(index - 1)
+        self._bump()
+        return point
+
+    def set_y(self, index, y):
+        self.y[index] = int(y)
+        self._update_around(index)
+        self._bump()
+
+    def move(self, index, x):
+        # Changing x may pass a neighbour, so the point is taken out and inserted back in order
+        y = self.y[index]
+        self.pop(index)
+        return self._insert_at(bisect_right(self.x, x), x, y)
+
+
+class PointStore:
+    """
+    The red, green and blue channels of the gradient being edited.
+
+    Indexing by colour gives the ChannelPoints; version changes whenever any
+    channel changes, so caches can compare it instead of the points. depth (a
+    BitDepth) sets the default points, (0, 0) to (x_max, y_max).
+    """
+
+    __slots__ = ("channels", "depth")
+
+    def __init__(self, points=None, depth=DEFAULT_DEPTH):
+        self.depth = depth
+        self.channels = {color: ChannelPoints(depth.default_points() if points is None else points[color])
+                         for color in CHANNELS}
+
+    def __getitem__(self, color):
+        return self.channels[color]
+
+    def __setitem__(self, color, points):
+        # Replaced in place, so views holding the channel stay attached
+        self.channels[color].replace(points)
+
+    def __iter__(self):
+        return iter(self.channels)
+
+    def items(self):
+        return self.channels.items()
+
+    @property
+    def version(self):
+        return max(channel.version for channel in self.channels.values())
+
+    def reset(self):
+        for channel in self.channels.values():
+            channel.replace(self.depth.default_points())
+
+    def snapshot(self):
+        return {color: list(channel) for color, channel in self.channels.items()}
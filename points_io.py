@@ -0,0 +1,183 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+import functools
+import io
+import os
+import re
+
+import numpy as np
+
+from lut import CHANNELS, build_lut, depth_for_points
+
+ARRAY_PATTERN = re.compile(r"(\w*?)(Red|Green|Blue)(X|Y)\s*=\s*\{([^}]*)\}")
+HEADER_PATTERN = re.compile(r"Lut(Red|Green|Blue)\s*\[\s*\d*\s*\]\s*=\s*\{([^}]*)\}")
+CUBE_KEYWORDS = re.compile(r"^\s*(?:[A-Za-z_#].*)?$", re.MULTILINE)
+
+
+def format_points(points, prefix="ThemeNamed"):
+    """
+    Formats a point set as the C-style array definitions written by "Export Points".
+
+    Arguments:
+    points -- dict of lists of (x, y) tuples keyed by "Red", "Green" and "Blue"
+    prefix -- name in front of every array (default: "ThemeNamed")
+
+    Returns:
+    The text of the points file
+    """
+    blocks = []
+    for color in CHANNELS:
+        channel = points[color]
+        blocks.append(f"{prefix}{color}Points = {len(channel)};\n"
+                      f"{prefix}{color}X = {{{', '.join(str(x) for x, _ in channel)}}};\n"
+                      f"{prefix}{color}Y = {{{', '.join(str(y) for _, y in channel)}}};\n")
+    return "\n".join(blocks)
+
+
+def parse_points(text):
+    """
+    Parses the text written by format_points back into a point set.
+
+    Returns:
+    dict of lists of (x, y) tuples keyed by "Red", "Green" and "Blue"
+    """
+    arrays = {}
+    for _, color, axis, values in ARRAY_PATTERN.findall(text):
+        arrays[color, axis] = np.fromstring(values, dtype=np.int64, sep=",") if values.strip() else \
+            np.empty(0, dtype=np.int64)
+
+    points = {}
+    for color in CHANNELS:
+        if (color, "X") not in arrays or (color, "Y") not in arrays:
+            raise ValueError(f"No {color} points found.")
+        xs, ys = arrays[color, "X"], arrays[color, "Y"]
+        if len(xs) != len(ys):
+            raise ValueError(f"{color} has {len(xs)} x values but {len(ys)} y values.")
+        points[color] = list(zip(xs.tolist(), ys.tolist()))
+    return points
+
+
+def read_points(path):
+    with open(path) as f:
+        return parse_points(f.read())
+
+
+def write_points(path, points, prefix="ThemeNamed"):
+    with open(path, 'w') as f:
+        f.write(format_points(points, prefix))
+
+
+def format_lut_header(lut, prefix="ThemeNamed"):
+    """
+    Formats the expanded LUT as a C header with one static const uint8_t array per channel.
+    """
+    ctype = "uint16_t" if lut.dtype.itemsize > 1 else "uint8_t"
+    lines = ["#pragma once", "", "#include <stdint.h>", "", f"#define {prefix}LutSize {len(lut)}", ""]
+    for channel, color in enumerate(CHANNELS):
+        values = lut[:, channel].tolist()
+        rows = [", ".join(str(v) for v in values[i:i + 16]) for i in range(0, len(values), 16)]
+        lines.append(f"static const {ctype} {prefix}Lut{color}[{len(values)}] = {{")
+        lines.append(",\n".join("    " + row for row in rows))
+        lines.append("};")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def format_lut(lut, extension, points=None, prefix="ThemeNamed"):
+    """
+    Formats a (n, 3) LUT as the bytes of a file of the given extension.
+
+    .npy    -- NumPy array
+    .raw    -- raw interleaved RGB bytes, n x 3, memory-mappable
+    .h      -- C header with one static const array per channel
+    .cube   -- 1D .cube LUT with values scaled to 0..1
+    .csv    -- index,red,green,blue rows
+    .txt    -- the point definitions (needs points)
+    """
+    extension = extension.lower()
+    lut = np.ascontiguousarray(lut)
+    if extension == ".npy":
+        buffer = io.BytesIO()
+        np.save(buffer, lut)
+        return buffer.getvalue()
+    if extension in (".raw", ".bin"):
+        return lut.tobytes()
+    if extension == ".h":
+        return format_lut_header(lut, prefix).encode()
+    if extension == ".cube":
+        # Every level is formatted once instead of once per entry (np.savetxt formats each value)
+        levels = _cube_levels(int(np.iinfo(lut.dtype).max))
+        lines = [f'TITLE "{prefix}"', f"LUT_1D_SIZE {len(lut)}", "DOMAIN_MIN 0 0 0", "DOMAIN_MAX 1 1 1"]
+        lines.extend(f"{levels[r]} {levels[g]} {levels[b]}" for r, g, b in lut.tolist())
+        return ("\n".join(lines) + "\n").encode()
+    if extension == ".csv":
+        lines = ["index,red,green,blue"]
+        lines.extend(f"{i},{r},{g},{b}" for i, (r, g, b) in enumerate(lut.tolist()))
+        return ("\n".join(lines) + "\n").encode()
+    if extension == ".txt":
+        if points is None:
+            raise ValueError("The points file format needs the points, not just the LUT.")
+        return format_points(points, prefix).encode()
+    raise ValueError(f"Unknown LUT format {extension!r}.")
+
+
+def write_lut(path, lut, points=None, prefix="ThemeNamed"):
+    """
+    Writes a (n, 3) LUT in the format given by the file extension, see format_lut.
+    """
+    data = format_lut(lut, os.path.splitext(path)[1], points, prefix)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+@functools.lru_cache(maxsize=2)
+def _cube_levels(maximum):
+    return [f"{value / maximum:.6f}" for value in range(maximum + 1)]
+
+
+def _numbers(text, sep, dtype):
+    text = text.strip()
+    return np.fromstring(text, dtype=dtype, sep=sep) if text else np.empty(0, dtype=dtype)
+
+
+def read_lut(path, dtype=None):
+    """
+    Reads a LUT written by write_lut, or expands a points file into one.
+
+    Binary formats are memory-mapped; text formats are parsed in bulk by NumPy.
+    dtype is needed for 16-bit .raw and .cube files, the other formats tell it.
+
+    Returns:
+    array of shape (n, 3)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r")
+    if extension in (".raw", ".bin"):
+        return np.memmap(path, dtype=dtype or np.uint8, mode="r").reshape(-1, 3)
+    if extension == ".txt":
+        points = read_points(path)
+        depth = depth_for_points(points)
+        return build_lut(*(points[color] for color in CHANNELS), size=depth.size, dtype=dtype or depth.dtype)
+
+    with open(path) as f:
+        text = f.read()
+
+    if extension == ".h":
+        channels = {color: _numbers(values, ",", np.int64)
+                    for color, values in HEADER_PATTERN.findall(text)}
+        if set(channels) != set(CHANNELS):
+            raise ValueError(f"{path} does not define a Red, Green and Blue LUT array.")
+        dtype = dtype or (np.uint16 if "uint16_t" in text else np.uint8)
+        return np.column_stack([channels[color] for color in CHANNELS]).astype(dtype)
+    if extension == ".cube":
+        # Keyword lines (TITLE, LUT_1D_SIZE, ...) and comments go, the rest is one block of numbers
+        dtype = dtype or np.uint8
+        values = _numbers(CUBE_KEYWORDS.sub("", text), " ", np.float64).reshape(-1, 3)
+        return np.rint(values * np.iinfo(dtype).max).astype(dtype)
+    if extension == ".csv":
+        body = text.split("\n", 1)[1] if not text[:1].isdigit() else text
+        values = _numbers(body.replace("\n", ","), ",", np.int64).reshape(-1, 4)[:, 1:]
+        return values.astype(dtype or (np.uint16 if values.max(initial=0) > 255 else np.uint8))
+    raise ValueError(f"Unknown LUT format {extension!r}.")
@@ -0,0 +1,59 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtGui import QImage, QPainter, QPainterPath, QPen, QColor
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+
+from cache import LRUCache
+
+# Preview images of recent point sets kept for undo/redo
+IMAGE_CACHE_SIZE = 32
+
+
+class GradientPreview(QWidget):
+    """
+    Paints the gradient straight from the LUT: a width x 1 QImage wrapped around the
+    table's buffer (no copy), stretched over the widget.
+
+    Only repaints when set_lut is given a new key; the images of recent keys are
+    kept, so going back to an earlier gradient doesn't wrap its table again.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.setMinimumHeight(50)
+        self._image = None
+        self._key = None
+        self._images = LRUCache(IMAGE_CACHE_SIZE)
+
+    def set_lut(self, lut, key):
+        if key == self._key:
+            return
+        if not lut.flags.c_contiguous:
+            raise ValueError("The LUT must be C-contiguous to be wrapped without a copy.")
+
+        # The image points into the LUT, so the array is cached alongside it
+        _, self._image = self._images.get_or_build(key, lambda: (lut, QImage(
+            lut.data, len(lut), 1, lut.nbytes, QImage.Format_RGB888)))
+        self._key = key
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+
+        # Rounded, white-bordered strip like the stylesheet preview it replaces
+        rect = QRectF(self.rect()).adjusted(1, 1, -1, -1)
+        path = QPainterPath()
+        path.addRoundedRect(rect, 5, 5)
+        if self._image is not None:
+            painter.setClipPath(path)
+            painter.drawImage(rect, self._image)
+            painter.setClipping(False)
+        painter.setPen(QPen(QColor(255, 255, 255), 2))
+        painter.setBrush(Qt.NoBrush)
+        painter.drawPath(path)
+        painter.end()
@@ -0,0 +1,108 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+Optional timing of the editor's refresh pipeline.
+
+Set GRADIENT_PROFILE=1 (or use View > Profile Refresh) to time every stage the
+render scheduler runs. When profiling is off the scheduler doesn't call into
+this module at all.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+PROFILE_ENV = "GRADIENT_PROFILE"
+# Durations kept per stage for the rolling statistics
+HISTORY = 600
+# Trace events kept for the Chrome trace, the oldest are dropped first
+TRACE_EVENTS = 100000
+# Histogram bin edges in ms, logarithmic from 10 us to 1 s
+HISTOGRAM_EDGES = np.logspace(-2, 3, 21)
+
+
+def profiling_requested():
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+class Profiler:
+    """
+    Collects stage durations (perf_counter_ns) and input events.
+
+    Every stage keeps its last HISTORY durations for percentiles and histograms,
+    and every measurement is also kept as a Chrome trace event ("X" phase) that
+    dump_trace writes for chrome://tracing or Perfetto.
+    """
+
+    def __init__(self, history=HISTORY):
+        self.enabled = False
+        self.history = history
+        self.stages = {}
+        self._events = deque(maxlen=history)
+        self._trace = deque(maxlen=TRACE_EVENTS)
+        self._origin = time.perf_counter_ns()
+
+    def clear(self):
+        self.stages.clear()
+        self._events.clear()
+        self._trace.clear()
+
+    def record(self, stage, start, end):
+        # start and end are perf_counter_ns values
+        durations = self.stages.get(stage)
+        if durations is None:
+            durations = self.stages[stage] = deque(maxlen=self.history)
+        durations.append(end - start)
+        self._trace.append((stage, start, end, threading.get_ident()))
+
+    def event(self):
+        # One input event (e.g. a mouse motion), for the events-per-second readout
+        if self.enabled:
+            self._events.append(time.perf_counter_ns())
+
+    def events_per_second(self):
+        if len(self._events) < 2:
+            return 0.0
+        span = self._events[-1] - self._events[0]
+        return (len(self._events) - 1) * 1e9 / span if span else 0.0
+
+    def durations(self, stage):
+        # The stage's recent durations in ms
+        return np.asarray(self.stages.get(stage, ()), dtype=np.float64) / 1e6
+
+    def percentiles(self, stage, percentiles=(50, 90, 99)):
+        durations = self.durations(stage)
+        if not len(durations):
+            return {}
+        return {p: float(v) for p, v in zip(percentiles, np.percentile(durations, percentiles))}
+
+    def histogram(self, stage):
+        """
+        Returns:
+        Tuple (counts, edges) of the stage's recent durations over HISTOGRAM_EDGES (ms)
+        """
+        counts, edges = np.histogram(np.clip(self.durations(stage), HISTOGRAM_EDGES[0], HISTOGRAM_EDGES[-1]),
+                                     HISTOGRAM_EDGES)
+        return counts, edges
+
+    def summary(self):
+        # Short readout: median/p99 frame time and the input event rate
+        frame = self.percentiles("frame", (50, 99))
+        if not frame:
+            return f"{self.events_per_second():.0f} ev/s"
+        return f"{frame[50]:.1f}/{frame[99]:.1f} ms, {self.events_per_second():.0f} ev/s"
+
+    def trace(self):
+        pid = os.getpid()
+        return [{"name": stage, "cat": "refresh", "ph": "X", "pid": pid, "tid": tid,
+                 "ts": (start - self._origin) / 1e3, "dur": (end - start) / 1e3}
+                for stage, start, end, tid in self._trace]
+
+    def dump_trace(self, path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace(), "displayTimeUnit": "ms"}, f)
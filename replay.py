@@ -0,0 +1,360 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+Records editing sessions and replays them headless as a latency acceptance test.
+
+Recording (View > Record Session..., or python Main.py --record session.npz) keeps
+the mouse presses, motions and releases on the graph, the edits typed into the
+point table and the channel, Reset, Undo and Redo commands, with their times, in
+a compressed .npz file. Other commands (files, themes, bit depth) are not
+recorded, so sessions should start from the gradient they edit.
+
+The player opens a Main window of the recorded size under the offscreen platform,
+restores the starting gradient and feeds the events in at their recorded pace
+through the canvas callbacks and the table model, like Qt would deliver them:
+
+python replay.py sessions/*.npz --budget latency_p99_ms=33 --budget cpu_s=2
+
+For every event that needs a repaint it measures the time from the input to the
+end of the frame showing it (the scheduler's flush and the paints it queued).
+Events that share a frame are coalesced; motions the editor was still too busy
+for when the next one arrived are dropped, like Qt compresses mouse moves. The
+exit status is 1 when a session exceeds a budget or doesn't end with the
+recorded gradient.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from lut import CHANNELS, BitDepth
+
+SESSION_VERSION = 1
+# Event kinds
+PRESS, MOTION, RELEASE, EDIT, COLOR, RESET, UNDO, REDO = range(8)
+MOUSE_EVENTS = {PRESS: "button_press_event", MOTION: "motion_notify_event", RELEASE: "button_release_event"}
+# 25 bytes per event before compression; x and y are canvas pixels, row, column and value a table edit
+EVENT_DTYPE = np.dtype([("time", "<f8"), ("kind", "u1"), ("button", "u1"), ("column", "u1"), ("x", "<f4"),
+                        ("y", "<f4"), ("row", "<u2"), ("value", "<i4")])
+# Budget of a replay unless --budget says otherwise, three frames at 60 Hz
+DEFAULT_BUDGET = {"latency_p99_ms": 50.0}
+# Scheduler stages whose p99 is reported
+STAGES = ("lut", "plot", "table", "preview", "frame")
+# Measurements a budget can limit
+BUDGET_NAMES = (("latency_p50_ms", "latency_p90_ms", "latency_p99_ms", "latency_max_ms", "latency_mean_ms",
+                 "dropped", "coalesced", "cpu_s", "wall_s") + tuple(f"{stage}_p99_ms" for stage in STAGES))
+# Longest sleep while waiting for the next event, in seconds
+WAIT_SLICE = 0.001
+# How long the last frames may take to show up after the last event, in seconds
+DRAIN_TIMEOUT = 5.0
+
+
+def _points(store):
+    return {color: [list(point) for point in store[color]] for color in CHANNELS}
+
+
+class SessionRecorder:
+    """
+    Records the input of an editor (Main) until stop(); save() writes the session.
+    """
+
+    def __init__(self, editor):
+        self.editor = editor
+        self.events = []
+        depth = editor.points.depth
+        self.meta = {"version": SESSION_VERSION, "input_bits": depth.input_bits, "output_bits": depth.output_bits,
+                     "color": editor.current_color, "points": _points(editor.points)}
+        self.start = time.perf_counter()
+
+        canvas = editor.canvas
+        self._callbacks = [canvas.mpl_connect(name, lambda event, kind=kind: self._mouse(kind, event))
+                           for kind, name in MOUSE_EVENTS.items()]
+        buttons = (editor.ui.pushButton, editor.ui.pushButton_2, editor.ui.pushButton_3)
+        self._signals = [(editor.table_model.cellEdited, self._edit),
+                         (editor.ui.pushButton_4.clicked, lambda *_: self._add(RESET)),
+                         (editor.undo_shortcut.activated, lambda: self._add(UNDO))]
+        self._signals += [(button.clicked, lambda *_, value=i: self._add(COLOR, value=value))
+                          for i, button in enumerate(buttons)]
+        self._signals += [(shortcut.activated, lambda: self._add(REDO)) for shortcut in editor.redo_shortcuts]
+        for signal, slot in self._signals:
+            signal.connect(slot)
+
+    def _geometry(self):
+        # Taken with the first event, once the window is shown and laid out
+        self.meta["window"] = [self.editor.MainWindow.width(), self.editor.MainWindow.height()]
+        self.meta["axes"] = [float(v) for v in self.editor.ax.bbox.bounds]
+
+    def _add(self, kind, button=0, x=0.0, y=0.0, row=0, column=0, value=0):
+        if "axes" not in self.meta:
+            self._geometry()
+        self.events.append((time.perf_counter() - self.start, kind, button, column, x, y, row, value))
+
+    def _mouse(self, kind, event):
+        # The Qt event's canvas position, event.x and event.y are cut to whole pixels
+        gui_event = getattr(event, "guiEvent", None)
+        x, y = self.editor.canvas.mouseEventCoords(gui_event) if gui_event is not None else (event.x, event.y)
+        self._add(kind, int(event.button or 0), x, y)
+
+    def _edit(self, row, column, value):
+        self._add(EDIT, row=row, column=column, value=value)
+
+    def stop(self):
+        # Disconnects from the editor and takes the final gradient the replay must arrive at
+        for cid in self._callbacks:
+            self.editor.canvas.mpl_disconnect(cid)
+        for signal, slot in self._signals:
+            signal.disconnect(slot)
+        self._callbacks, self._signals = [], []
+        if "axes" not in self.meta:
+            self._geometry()
+        self.meta["final"] = _points(self.editor.points)
+        self.meta["duration"] = time.perf_counter() - self.start
+
+    def save(self, path):
+        if self._signals:
+            self.stop()
+        np.savez_compressed(path, events=np.array(self.events, dtype=EVENT_DTYPE),
+                            meta=np.array(json.dumps(self.meta)))
+
+
+def load_session(path):
+    """
+    Returns:
+    Tuple (events, meta): the EVENT_DTYPE array and the recorded settings and gradients
+    """
+    with np.load(path, allow_pickle=False) as data:
+        events = data["events"]
+        meta = json.loads(str(data["meta"]))
+    if meta.get("version") != SESSION_VERSION or events.dtype != EVENT_DTYPE:
+        raise ValueError(f"{path} is not a session of version {SESSION_VERSION}.")
+    return events, meta
+
+
+class SessionPlayer:
+    """
+    Replays a session against a fresh editor and measures it.
+
+    Arguments:
+    path -- session file
+    fast -- don't keep the recorded pace: every event is handled and rendered before the
+            next one (no coalescing or drops, the worst case per event, like benchmark.py drag)
+    speed -- pace factor, 2 replays twice as fast as recorded
+    """
+
+    def __init__(self, path, fast=False, speed=1.0):
+        self.events, self.meta = load_session(path)
+        self.fast = fast
+        self.speed = speed
+        self.latencies = []
+        self._waiting = []
+        self.frames = self.coalesced = self.dropped = self.dispatched = 0
+
+    def _open(self):
+        from PyQt5 import QtWidgets
+        from editor import Main
+
+        self.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        meta = self.meta
+        self.editor = editor = Main(BitDepth(meta["input_bits"], meta["output_bits"]))
+        editor.MainWindow.resize(*meta["window"])
+        editor.MainWindow.show()
+        self.app.processEvents()
+        for color in CHANNELS:
+            editor.points[color] = [tuple(point) for point in meta["points"][color]]
+        editor.history.checkpoint()
+        editor.change_active_color(meta["color"])
+        editor.schedule_refresh()
+        editor.scheduler.flush()
+        self.app.processEvents()
+
+        # Canvas pixels of the recording, mapped through the axes when the canvas came out another size
+        recorded, bounds = np.asarray(meta["axes"]), np.asarray(editor.ax.bbox.bounds)
+        self._scale = bounds[2:] / recorded[2:]
+        self._offset = bounds[:2] - recorded[:2] * self._scale
+
+        editor.profiler.clear()
+        editor.profiler.enabled = True
+        editor.scheduler.profiler = editor.profiler
+        editor.scheduler.flushed.connect(self._flushed)
+
+    def _flushed(self):
+        # The flush has redrawn the views; the paints it queued are delivered before the frame counts as shown
+        self.app.processEvents()
+        end = time.perf_counter()
+        if self._waiting:
+            self.latencies.extend((end - start) * 1e3 for start in self._waiting)
+            self.frames += 1
+            self.coalesced += len(self._waiting) - 1
+            self._waiting = []
+
+    def _dispatch(self, event, start):
+        from matplotlib.backend_bases import MouseEvent
+
+        editor = self.editor
+        kind = event["kind"]
+        if kind in MOUSE_EVENTS:
+            name = MOUSE_EVENTS[kind]
+            x, y = np.array([event["x"], event["y"]], dtype=np.float64) * self._scale + self._offset
+            editor.canvas.callbacks.process(name, MouseEvent(name, editor.canvas, x, y,
+                                                             button=int(event["button"]) or None))
+        elif kind == EDIT:
+            model = editor.table_model
+            model.setData(model.index(int(event["row"]), int(event["column"])), str(int(event["value"])))
+        elif kind == COLOR:
+            editor.change_active_color(CHANNELS[event["value"]])
+        elif kind == RESET:
+            editor.reset_plot()
+        elif kind == UNDO:
+            editor.undo()
+        elif kind == REDO:
+            editor.redo()
+        self.dispatched += 1
+        # Events that changed nothing on screen (e.g. moving the cursor without a drag) aren't timed
+        if editor.scheduler.pending():
+            self._waiting.append(start)
+
+    def run(self):
+        """
+        Returns:
+        dict of the measurements: event counts, latency percentiles in ms, CPU and wall time
+        """
+        self._open()
+        events, scheduler = self.events, self.editor.scheduler
+        times = self.events["time"] / self.speed
+        cpu_start = time.process_time()
+        origin = time.perf_counter()
+        i = 0
+        while i < len(events):
+            now = time.perf_counter()
+            if self.fast:
+                self._dispatch(events[i], now)
+                scheduler.flush()
+                i += 1
+                continue
+            due = origin + times[i]
+            if now < due:
+                self.app.processEvents()
+                time.sleep(max(min(due - time.perf_counter(), WAIT_SLICE), 0))
+                continue
+            if (events[i]["kind"] == MOTION and i + 1 < len(events) and events[i + 1]["kind"] == MOTION
+                    and origin + times[i + 1] <= now):
+                # A newer motion is already waiting: this one is never seen
+                self.dropped += 1
+            else:
+                # The latency counts from when the input happened, waiting included
+                self._dispatch(events[i], due)
+            i += 1
+
+        deadline = time.perf_counter() + DRAIN_TIMEOUT
+        while self._waiting and time.perf_counter() < deadline:
+            self.app.processEvents()
+            time.sleep(WAIT_SLICE)
+        wall = time.perf_counter() - origin
+        cpu = time.process_time() - cpu_start
+
+        latencies = np.asarray(self.latencies)
+        results = {"events": len(events), "dispatched": self.dispatched, "dropped": self.dropped,
+                   "repainted": len(latencies), "frames": self.frames, "coalesced": self.coalesced,
+                   "unpainted": len(self._waiting)}
+        if len(latencies):
+            for p in (50, 90, 99):
+                results[f"latency_p{p}_ms"] = float(np.percentile(latencies, p))
+            results["latency_max_ms"] = float(latencies.max())
+            results["latency_mean_ms"] = float(latencies.mean())
+        for stage in STAGES:
+            stage_p99 = self.editor.profiler.percentiles(stage, (99,))
+            if stage_p99:
+                results[f"{stage}_p99_ms"] = stage_p99[99]
+        results["cpu_s"] = cpu
+        results["wall_s"] = wall
+        results["final_match"] = _points(self.editor.points) == self.meta["final"]
+        return results
+
+    def close(self):
+        self.editor.scheduler.flushed.disconnect(self._flushed)
+        self.editor.MainWindow.close()
+
+
+def check_budget(results, budget):
+    """
+    Returns:
+    list of the failures, empty when the replay is within the budget
+    """
+    failures = []
+    if not results["final_match"]:
+        failures.append("the replay didn't end with the recorded gradient")
+    if results["unpainted"]:
+        failures.append(f"{results['unpainted']} events were never painted")
+    for name, limit in budget.items():
+        value = results.get(name)
+        if value is not None and value > limit:
+            failures.append(f"{name} {value:.3f} over the budget of {limit:g}")
+    return failures
+
+
+def parse_budget(items):
+    budget = dict(DEFAULT_BUDGET)
+    for item in items:
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in BUDGET_NAMES:
+            raise argparse.ArgumentTypeError(f"Unknown budget {name!r}; use one of {', '.join(BUDGET_NAMES)}.")
+        try:
+            budget[name] = float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Expected NAME=VALUE, e.g. latency_p99_ms=33, got {item!r}.")
+    return budget
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded editing sessions and check their latency.")
+    parser.add_argument("sessions", nargs="+", help="session files recorded with View > Record Session")
+    parser.add_argument("--budget", action="append", default=[], metavar="NAME=VALUE",
+                        help="limit of a measurement, e.g. latency_p99_ms=33, latency_max_ms=100, dropped=0, "
+                             "cpu_s=2 (repeatable; default: latency_p99_ms=50)")
+    parser.add_argument("--fast", action="store_true", help="render after every event instead of the recorded pace")
+    parser.add_argument("--speed", type=float, default=1.0, help="pace factor (default: 1, as recorded)")
+    parser.add_argument("--json", help="save the results of every session to this file")
+    parser.add_argument("--trace", help="save a Chrome trace of the last session's refresh stages")
+    args = parser.parse_args(argv)
+    try:
+        budget = parse_budget(args.budget)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    results = {}
+    failed = False
+    for path in args.sessions:
+        try:
+            player = SessionPlayer(path, args.fast, args.speed)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            failed = True
+            continue
+        results[path] = session = player.run()
+        if args.trace:
+            player.editor.profiler.dump_trace(args.trace)
+        player.close()
+
+        failures = check_budget(session, budget)
+        failed |= bool(failures)
+        print(f"[{path}] {'FAIL' if failures else 'ok'}")
+        for name, value in session.items():
+            print(f"  {name:24} {value:12.3f}" if isinstance(value, float) else f"  {name:24} {value!s:>12}")
+        for failure in failures:
+            print(f"  over budget: {failure}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+from time import perf_counter_ns
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+# Marks a view as needing a complete redraw rather than a partial one
+FULL = "full"
+# Refresh interval while dragging, about one 60 Hz frame
+FRAME_INTERVAL = 16
+
+
+class RenderScheduler(QObject):
+    """
+    Coalesces refresh requests so each view is redrawn at most once per frame.
+
+    Views are registered with a callback and marked dirty with optional change
+    items (e.g. the rows that moved). Marks are merged until the timer fires, then
+    every dirty view's callback runs once, in registration order, with the set of
+    items collected since the last refresh. Intermediate states of a burst of
+    events are therefore never rendered.
+
+    With a profiler set, every callback and the whole flush ("frame") are timed;
+    without one flush doesn't measure anything.
+    """
+
+    flushed = pyqtSignal()
+
+    def __init__(self, interval=0, parent=None):
+        super().__init__(parent)
+        self._views = []
+        self._dirty = {}
+        self.profiler = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+
+    def register(self, view, callback):
+        self._views.append((view, callback))
+
+    def set_interval(self, interval):
+        # 0 refreshes as soon as the event queue is empty, FRAME_INTERVAL paces refreshes to the display
+        self._timer.setInterval(interval)
+
+    def mark(self, view, item=FULL):
+        self._dirty.setdefault(view, set()).add(item)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def pending(self):
+        return bool(self._dirty)
+
+    def flush(self):
+        self._timer.stop()
+        dirty, self._dirty = self._dirty, {}
+        if self.profiler is None:
+            for view, callback in self._views:
+                if view in dirty:
+                    callback(dirty[view])
+        else:
+            self._profiled_flush(dirty)
+        self.flushed.emit()
+
+    def _profiled_flush(self, dirty):
+        record = self.profiler.record
+        frame_start = perf_counter_ns()
+        for view, callback in self._views:
+            if view in dirty:
+                start = perf_counter_ns()
+                callback(dirty[view])
+                record(view, start, perf_counter_ns())
+        record("frame", frame_start, perf_counter_ns())
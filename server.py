@@ -0,0 +1,292 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+Headless LUT and colorization service for a theme library, without Qt.
+
+python server.py themes/ --port 8765
+python server.py themes/ --unix /tmp/gradient.sock
+
+GET  /themes                       JSON list of the themes with their bit depth and content hash
+GET  /lut/NAME.EXT                 the theme's LUT as .npy .raw .h .cube .csv .txt or .png
+POST /colorize/NAME?shape=HxW      body: raw little-endian uint16 values or a .npy array;
+     &format=raw|npy|png&alpha=1   answer: the coloured image (raw interleaved RGB by default)
+GET  /stats                        JSON request counts, latency percentiles and throughput per route
+
+LUT responses are cached by (content hash, format), plus the theme's name for the
+formats that contain it, so a theme is formatted once per change; colorization runs on a thread pool so large uploads don't stall the
+other requests.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+
+from cache import LRUCache
+from core import colorize, format_lut
+from image_export import export_gradient_image
+from pngwriter import PNGWriter
+from profiling import Profiler
+from themes import ThemeStore, theme_prefix
+
+HOST = "127.0.0.1"
+PORT = 8765
+# Formatted LUT responses kept, keyed by (content hash, format, name prefix or None)
+RESPONSE_CACHE_SIZE = 256
+# Largest accepted upload, 256 MB (a 8192 x 16384 uint16 frame)
+MAX_BODY = 256 << 20
+LUT_FORMATS = (".npy", ".raw", ".h", ".cube", ".csv", ".txt", ".png")
+# Formats that carry the theme's name (array names, TITLE), cached per name as well as per content
+NAMED_FORMATS = (".h", ".cube", ".txt")
+CONTENT_TYPES = {".npy": "application/octet-stream", ".raw": "application/octet-stream", ".h": "text/x-c",
+                 ".cube": "text/plain", ".csv": "text/csv", ".txt": "text/plain", ".png": "image/png",
+                 ".json": "application/json"}
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def lut_file(lut, extension, points, name):
+    # The bytes of one export format, like themes.export_theme writes them
+    if extension == ".png":
+        buffer = io.BytesIO()
+        export_gradient_image(buffer, lut, bit_depth=lut.dtype.itemsize * 8, fmt="png")
+        return buffer.getvalue()
+    return format_lut(lut, extension, points, prefix=theme_prefix(name))
+
+
+def read_values(body, shape=None):
+    # A .npy upload carries its shape, raw uint16 needs it in the query (default: flat)
+    if body[:6] == b"\x93NUMPY":
+        values = np.load(io.BytesIO(body), allow_pickle=False)
+    else:
+        if len(body) % 2:
+            raise HTTPError(400, "Raw uploads are little-endian uint16 values, the length must be even.")
+        values = np.frombuffer(body, dtype="<u2")
+        if shape is not None:
+            if int(np.prod(shape)) != len(values):
+                raise HTTPError(400, f"{len(values)} values don't make a {'x'.join(map(str, shape))} image.")
+            values = values.reshape(shape)
+    if values.dtype.kind not in "ui":
+        raise HTTPError(400, f"Expected integer values, got {values.dtype}.")
+    return values
+
+
+def colorize_response(values, lut, output_format, alpha):
+    rgb = colorize(values, lut, alpha=alpha)
+    if output_format == "raw":
+        return rgb.astype(rgb.dtype.newbyteorder("<"), copy=False).tobytes(), "application/octet-stream"
+    if output_format == "npy":
+        buffer = io.BytesIO()
+        np.save(buffer, rgb)
+        return buffer.getvalue(), "application/octet-stream"
+    if rgb.ndim != 3:
+        raise HTTPError(400, "PNG output needs a 2-D image; pass shape=HxW.")
+    buffer = io.BytesIO()
+    with PNGWriter(buffer, rgb.shape[1], rgb.shape[0], channels=rgb.shape[2], bit_depth=rgb.dtype.itemsize * 8) as png:
+        png.write_rows(rgb)
+    return buffer.getvalue(), "image/png"
+
+
+class GradientServer:
+    """
+    Serves the themes of a ThemeStore over HTTP/1.1 (keep-alive) on TCP or a Unix socket.
+
+    Everything but the formatting and colorization runs on the event loop, so the
+    caches need no locks; the CPU-bound work goes to a thread pool (NumPy releases
+    the GIL while it indexes the LUT).
+    """
+
+    def __init__(self, store, workers=None, cache_size=RESPONSE_CACHE_SIZE):
+        self.store = store
+        self.responses = LRUCache(cache_size)
+        # Responses being formatted, so concurrent requests for one wait for the same result
+        self._pending = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.profiler = Profiler()
+        self.requests = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.started = time.perf_counter()
+
+    async def start(self, host=HOST, port=PORT, unix=None):
+        if unix:
+            return await asyncio.start_unix_server(self.handle, unix)
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                start = time.perf_counter_ns()
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                route = "error"
+                if length > MAX_BODY:
+                    status, content_type, payload = 413, "text/plain", b"Upload too large.\n"
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    self.bytes_in += length
+                    route, status, content_type, payload = await self.respond(method, target, body)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                writer.write((f"{version} {status} {REASONS.get(status, '')}\r\n"
+                              f"Content-Type: {content_type}\r\nContent-Length: {len(payload)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1"))
+                writer.write(payload)
+                await writer.drain()
+                self.bytes_out += len(payload)
+                self.requests[route] = self.requests.get(route, 0) + 1
+                self.profiler.record(route, start, time.perf_counter_ns())
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method, target, body):
+        """
+        Returns:
+        Tuple (route, status, content type, payload)
+        """
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        route = parts[0] if parts[0] in ("themes", "lut", "colorize", "stats") else "error"
+        try:
+            if route == "error":
+                raise HTTPError(404, f"No route {url.path!r}.")
+            expected = "POST" if route == "colorize" else "GET"
+            if method != expected:
+                raise HTTPError(405, f"{url.path} takes {expected} requests.")
+            if route == "themes":
+                return route, 200, CONTENT_TYPES[".json"], self.themes_json()
+            if route == "stats":
+                return route, 200, CONTENT_TYPES[".json"], json.dumps(self.stats(), indent=1).encode()
+            if len(parts) != 2:
+                raise HTTPError(404, f"Expected /{route}/NAME, got {url.path!r}.")
+            if route == "lut":
+                name, extension = os.path.splitext(parts[1])
+                return (route, 200, CONTENT_TYPES.get(extension.lower(), "application/octet-stream"),
+                        await self.lut_response(name, extension.lower()))
+            payload, content_type = await self.colorize_response(parts[1], parse_qs(url.query), body)
+            return route, 200, content_type, payload
+        except HTTPError as e:
+            return route, e.status, "text/plain", f"{e}\n".encode()
+        except ValueError as e:
+            return route, 400, "text/plain", f"{e}\n".encode()
+        except Exception as e:
+            return route, 500, "text/plain", f"{type(e).__name__}: {e}\n".encode()
+
+    def theme(self, name):
+        # The theme's content hash and its LUT (built once, cached by the store)
+        if name not in self.store:
+            raise HTTPError(404, f"No theme {name!r}.")
+        return self.store.themes[name]["hash"], self.store.table(name)
+
+    def themes_json(self):
+        themes = [{"name": name, "input_bits": self.store.depth(name).input_bits,
+                   "output_bits": self.store.depth(name).output_bits, "hash": self.store.themes[name]["hash"]}
+                  for name in self.store.names()]
+        return json.dumps(themes, indent=1).encode()
+
+    async def lut_response(self, name, extension):
+        if extension not in LUT_FORMATS:
+            raise HTTPError(404, f"Unknown LUT format {extension!r}; use one of {', '.join(LUT_FORMATS)}.")
+        content_hash, lut = self.theme(name)
+        key = (content_hash, extension, theme_prefix(name) if extension in NAMED_FORMATS else None)
+        payload = self.responses.get(key)
+        if payload is not None:
+            return payload
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await pending
+        pending = self._pending[key] = asyncio.get_running_loop().run_in_executor(
+            self.executor, lut_file, lut, extension, self.store.points(name), name)
+        try:
+            payload = await pending
+        finally:
+            del self._pending[key]
+        self.responses.put(key, payload)
+        return payload
+
+    async def colorize_response(self, name, query, body):
+        _, lut = self.theme(name)
+        shape = tuple(int(v) for v in query["shape"][0].lower().split("x")) if "shape" in query else None
+        output_format = query.get("format", ["raw"])[0]
+        if output_format not in ("raw", "npy", "png"):
+            raise HTTPError(400, f"Unknown output format {output_format!r}; use raw, npy or png.")
+        alpha = query.get("alpha", ["0"])[0] not in ("0", "")
+        values = read_values(body, shape)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, colorize_response, values, lut, output_format, alpha)
+
+    def stats(self):
+        uptime = time.perf_counter() - self.started
+        routes = {}
+        for route, count in sorted(self.requests.items()):
+            latency = self.profiler.percentiles(route, (50, 90, 99))
+            routes[route] = {"requests": count, "per_second": count / uptime,
+                             "latency_ms": {f"p{p}": round(v, 3) for p, v in latency.items()}}
+        return {"uptime_s": round(uptime, 3), "routes": routes, "bytes_in": self.bytes_in, "bytes_out": self.bytes_out,
+                "cache": {"entries": len(self.responses), "hits": self.responses.hits,
+                          "misses": self.responses.misses}}
+
+
+async def serve(store, host=HOST, port=PORT, unix=None, workers=None):
+    server = GradientServer(store, workers)
+    listener = await server.start(host, port, unix)
+    print(f"Serving {len(store)} themes on {unix or f'http://{host}:{port}'}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the LUTs of a theme library and colour uploaded frames.")
+    parser.add_argument("themes", help="theme library directory")
+    parser.add_argument("--host", default=HOST, help=f"address to listen on (default: {HOST})")
+    parser.add_argument("--port", type=int, default=PORT, help=f"TCP port (default: {PORT})")
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, help="colorization threads (default: by core count)")
+    args = parser.parse_args(argv)
+
+    store = ThemeStore(args.themes)
+    try:
+        asyncio.run(serve(store, args.host, args.port, args.unix, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
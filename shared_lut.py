@@ -0,0 +1,250 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+Publishes the gradient being edited to other processes through shared memory.
+
+The editor (View > Publish Shared LUT, or --share) writes the LUT and the points
+into a named shared memory block on every change; readers map the same block and
+see each edit without any file I/O:
+
+    from shared_lut import SharedLUTReader
+
+    reader = SharedLUTReader()
+    lut, points, depth, sequence = reader.read()
+    ...
+    update = reader.poll(sequence)        # None until the gradient changes
+
+Block layout (little-endian):
+    header   16 uint64: magic, sequence, LUT entries, bytes per value, input bits,
+             output bits, red/green/blue point counts, publish time (ns since the epoch)
+    LUT      room for 65536 x 3 uint16 values; the first entries x 3 values are used
+    points   3 x MAX_POINTS x 2 float64 (x, y), red, green and blue
+
+The sequence is a seqlock: odd while the publisher writes, incremented again when
+done. A reader copies the data and checks that the sequence was even and unchanged
+around the copy, so it never returns a torn table.
+
+Needs multiprocessing.shared_memory (Python 3.8+).
+
+python shared_lut.py [NAME]      (print every update of a published gradient)
+"""
+
+import sys
+import time
+
+import numpy as np
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    # Python 3.7: the editor still runs, only publishing is unavailable
+    resource_tracker = shared_memory = None
+
+from lut import CHANNELS, BitDepth
+from lut_stack import MAX_POINTS
+
+SHARED_NAME = "gradient_lut"
+MAGIC = 0x54554C4744415247  # "GRADGLUT"
+HEADER_FIELDS = 16
+MAX_ENTRIES = 1 << 16
+LUT_OFFSET = HEADER_FIELDS * 8
+POINTS_OFFSET = LUT_OFFSET + MAX_ENTRIES * 3 * 2
+BLOCK_SIZE = POINTS_OFFSET + 3 * MAX_POINTS * 2 * 8
+# Header fields
+SEQUENCE, ENTRIES, ITEM_SIZE, INPUT_BITS, OUTPUT_BITS, COUNTS, PUBLISHED = 1, 2, 3, 4, 5, 6, 9
+# How often a reader retries a copy that raced with a write before giving up
+READ_RETRIES = 1000
+# Reader poll interval of the command line watcher, in seconds
+POLL_INTERVAL = 0.002
+
+# Blocks published by this process; a reader of one of them must not untrack it
+_published = set()
+
+
+def _require_shared_memory():
+    if shared_memory is None:
+        raise RuntimeError("Shared LUT publishing needs Python 3.8 or newer (multiprocessing.shared_memory).")
+
+
+def _views(buffer):
+    header = np.frombuffer(buffer, dtype="<u8", count=HEADER_FIELDS)
+    table = np.frombuffer(buffer, dtype=np.uint8, count=POINTS_OFFSET - LUT_OFFSET, offset=LUT_OFFSET)
+    points = np.frombuffer(buffer, dtype="<f8", count=3 * MAX_POINTS * 2, offset=POINTS_OFFSET)
+    return header, table, points.reshape(3, MAX_POINTS, 2)
+
+
+class SharedLUTPublisher:
+    """
+    Owns the shared block and writes the gradient into it. An existing block of the
+    same name (e.g. left behind by a crashed editor) is taken over.
+    """
+
+    def __init__(self, name=SHARED_NAME):
+        _require_shared_memory()
+        try:
+            self._memory = shared_memory.SharedMemory(name, create=True, size=BLOCK_SIZE)
+        except FileExistsError:
+            self._memory = shared_memory.SharedMemory(name)
+            if self._memory.size < BLOCK_SIZE:
+                self._memory.close()
+                raise ValueError(f"Shared memory block {name!r} exists and is too small for a LUT.")
+        self.name = name
+        _published.add(self._memory._name)
+        self._header, self._table, self._points = _views(self._memory.buf)
+        self._header[0] = MAGIC
+        # Keep counting from a taken-over block's sequence so its readers see the next update
+        self._header[SEQUENCE] += self._header[SEQUENCE] % 2
+
+    @property
+    def sequence(self):
+        return int(self._header[SEQUENCE])
+
+    def publish(self, lut, points=None, depth=None):
+        """
+        Writes a new gradient.
+
+        Arguments:
+        lut -- uint8 or uint16 array of shape (n, 3), n up to 65536
+        points -- optional points indexed by "Red", "Green" and "Blue" (a PointStore, Snapshot or dict),
+                  at most MAX_POINTS per channel
+        depth -- BitDepth of the points (default: from the LUT's size and dtype)
+        """
+        lut = np.ascontiguousarray(lut)
+        if len(lut) > MAX_ENTRIES or lut.shape[1:] != (3,) or lut.dtype not in (np.uint8, np.uint16):
+            raise ValueError(f"Expected a uint8 or uint16 LUT of up to {MAX_ENTRIES} x 3 entries.")
+        if depth is None:
+            depth = BitDepth(max(int(len(lut) - 1).bit_length(), 10), lut.dtype.itemsize * 8)
+        channels = []
+        for color in CHANNELS:
+            values = np.asarray(list(points[color]) if points is not None else (), dtype=np.float64).reshape(-1, 2)
+            if len(values) > MAX_POINTS:
+                raise ValueError(f"The gradient has {len(values)} {color} points, at most {MAX_POINTS} fit.")
+            channels.append(values)
+
+        header = self._header
+        # Odd: readers retry until the write is finished
+        header[SEQUENCE] += 1
+        self._table[:lut.nbytes] = lut.reshape(-1).view(np.uint8)
+        header[ENTRIES], header[ITEM_SIZE] = len(lut), lut.dtype.itemsize
+        header[INPUT_BITS], header[OUTPUT_BITS] = depth.input_bits, depth.output_bits
+        for channel, values in enumerate(channels):
+            self._points[channel, :len(values)] = values
+            header[COUNTS + channel] = len(values)
+        header[PUBLISHED] = time.time_ns()
+        header[SEQUENCE] += 1
+
+    def close(self):
+        # Removes the block, readers keep their mapping until they close it
+        self._header = self._table = self._points = None
+        self._memory.close()
+        self._memory.unlink()
+        _published.discard(self._memory._name)
+
+
+class SharedLUTReader:
+    """
+    Maps a published block. table() is a zero-copy view of the current LUT (it may
+    change while it is used); read() and poll() return consistent copies.
+    """
+
+    def __init__(self, name=SHARED_NAME):
+        _require_shared_memory()
+        try:
+            self._memory = shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            # Before Python 3.13 every attached block is tracked and removed when this
+            # process exits, taking it away from the publisher; readers opt out
+            self._memory = shared_memory.SharedMemory(name)
+            if self._memory._name not in _published:
+                resource_tracker.unregister(self._memory._name, "shared_memory")
+        self.name = name
+        self._header, self._table, self._points = _views(self._memory.buf)
+        if self._header[0] != MAGIC:
+            self.close()
+            raise ValueError(f"Shared memory block {name!r} doesn't hold a gradient LUT.")
+
+    @property
+    def sequence(self):
+        return int(self._header[SEQUENCE])
+
+    def published(self):
+        # Publish time of the current gradient, in ns since the epoch (time.time_ns)
+        return int(self._header[PUBLISHED])
+
+    def table(self):
+        # Zero-copy, read-only view of the current LUT
+        header = self._header
+        entries, item_size = int(header[ENTRIES]), int(header[ITEM_SIZE])
+        dtype = np.uint16 if item_size == 2 else np.uint8
+        view = self._table[:entries * 3 * item_size].view(dtype).reshape(entries, 3)
+        view.flags.writeable = False
+        return view
+
+    def read(self, out=None):
+        """
+        Copies the current gradient.
+
+        Arguments:
+        out -- optional array to copy the LUT into, reused when its shape and dtype match
+
+        Returns:
+        Tuple (lut, points, depth, sequence); points is a dict of lists of integer (x, y) tuples
+        """
+        header = self._header
+        for _ in range(READ_RETRIES):
+            before = int(header[SEQUENCE])
+            if before % 2:
+                time.sleep(0)
+                continue
+            table = self.table()
+            if out is not None and out.shape == table.shape and out.dtype == table.dtype:
+                np.copyto(out, table)
+                lut = out
+            else:
+                lut = table.copy()
+            counts = header[COUNTS:COUNTS + 3].copy()
+            values = self._points.copy()
+            depth = (int(header[INPUT_BITS]), int(header[OUTPUT_BITS]))
+            if int(header[SEQUENCE]) == before:
+                # Stored as float64, the points are integers again for the reader
+                points = {color: [tuple(point) for point in values[channel, :counts[channel]].astype(np.int64).tolist()]
+                          for channel, color in enumerate(CHANNELS)}
+                return lut, points, BitDepth(*depth), before
+        raise TimeoutError(f"Shared memory block {self.name!r} kept changing during the read.")
+
+    def poll(self, sequence, out=None):
+        # The read() tuple when the gradient changed since sequence, otherwise None
+        if int(self._header[SEQUENCE]) == sequence:
+            return None
+        return self.read(out)
+
+    def close(self):
+        self._header = self._table = self._points = None
+        self._memory.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    reader = SharedLUTReader(argv[0] if argv else SHARED_NAME)
+    lut, points, depth, sequence = reader.read()
+    print(f"{reader.name}: {len(lut)} x 3 {lut.dtype}, {depth.input_bits}-bit in {depth.output_bits}-bit out")
+    try:
+        while True:
+            update = reader.poll(sequence, out=lut)
+            if update is None:
+                time.sleep(POLL_INTERVAL)
+                continue
+            lut, points, depth, sequence = update
+            latency = (time.time_ns() - reader.published()) / 1e6
+            counts = ", ".join(str(len(points[color])) for color in CHANNELS)
+            print(f"update {sequence // 2}: {counts} points, seen {latency:.2f} ms after publishing")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+import numpy as np
+
+from lut import LUT_SIZE, interpolate_channel
+
+
+def merged_breakpoints(red_points, green_points, blue_points):
+    """
+    Merges the breakpoints of the three channels.
+
+    Between two merged breakpoints every channel is linear, so these stops
+    reproduce the gradient exactly.
+
+    Returns:
+    Tuple (xs, colors): sorted unique x positions and a float (n, 3) array of channel values
+    """
+    channels = (red_points, green_points, blue_points)
+    xs = np.unique(np.concatenate([np.asarray([x for x, _ in points], dtype=np.float64) for points in channels]))
+    colors = np.column_stack([interpolate_channel(points, xs) for points in channels])
+    return xs, colors
+
+
+def chord_errors(xs, colors):
+    """
+    Computes the error of replacing the curve between every pair of breakpoints by a straight line.
+
+    Both the curve and the chord are linear between breakpoints, so the largest
+    deviation always sits on one of them and checking those is exact.
+
+    Returns:
+    (n, n) array; entry [a, b] is the max per-channel error of the chord a -> b for a < b
+    """
+    n = len(xs)
+    a = np.arange(n)[:, None, None]
+    b = np.arange(n)[None, :, None]
+    k = np.arange(n)[None, None, :]
+    inside = (a < k) & (k < b)
+
+    # t[a, b, k]: position of breakpoint k along the chord a -> b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (xs[k] - xs[a]) / (xs[b] - xs[a])
+    t[~inside] = 0
+
+    errors = np.zeros((n, n))
+    for channel in colors.T:
+        deviation = np.abs(channel[a] + t * (channel[b] - channel[a]) - channel[k])
+        deviation[~inside] = 0
+        np.maximum(errors, deviation.max(axis=2), out=errors)
+    errors[np.arange(n)[:, None] >= np.arange(n)[None, :]] = np.inf
+    return errors
+
+
+def reduce_stops(red_points, green_points, blue_points, max_error=0.0, max_stops=None):
+    """
+    Finds the smallest set of gradient stops that stays within max_error of all three channels.
+
+    Stops are picked from the merged channel breakpoints. If even the best set
+    within the budget can't reach max_error, the set with the lowest possible
+    error for max_stops stops is returned instead. The work depends only on the
+    number of breakpoints (at most 60 for 20 per channel), not on the 4096 LUT entries.
+
+    Arguments:
+    red_points, green_points, blue_points -- lists of (x, y) tuples
+    max_error -- allowed deviation per channel in colour levels (default: 0, exact)
+    max_stops -- maximum number of stops, at least 2 (default: no limit)
+
+    Returns:
+    Tuple (stops, error): list of (x, (r, g, b)) float stops and the max per-channel error they achieve
+    """
+    if max_stops is not None and max_stops < 2:
+        raise ValueError("At least 2 stops are required.")
+
+    xs, colors = merged_breakpoints(red_points, green_points, blue_points)
+    n = len(xs)
+    if n <= 2:
+        return [(x, tuple(c)) for x, c in zip(xs.tolist(), colors.tolist())], 0.0
+
+    errors = chord_errors(xs, colors)
+    max_edges = n - 1 if max_stops is None else min(max_stops - 1, n - 1)
+
+    # best[b]: lowest error of any path 0 -> b using the current number of chords
+    best = errors[0].copy()
+    best[0] = np.inf
+    parents = [np.zeros(n, dtype=np.intp)]
+    edges = 1
+    while best[-1] > max_error + 1e-9 and edges < max_edges:
+        candidates = np.maximum(best[:, None], errors)
+        parent = candidates.argmin(axis=0)
+        best = candidates[parent, np.arange(n)]
+        parents.append(parent)
+        edges += 1
+
+    # Walk the chosen chords back from the last breakpoint
+    path = [n - 1]
+    for parent in reversed(parents[1:]):
+        path.append(parent[path[-1]])
+    path.append(0)
+    path.reverse()
+
+    stops = [(xs[i].item(), tuple(colors[i].tolist())) for i in path]
+    return stops, float(best[-1])
+
+
+def normalized_stops(stops, size=LUT_SIZE, y_max=255):
+    """
+    Converts stops from reduce_stops to (pos, (r, g, b, a)) with positions in 0..1 and 8-bit colours.
+
+    size and y_max give the domain of the stops (BitDepth.size and BitDepth.y_max).
+    """
+    scale = 255.0 / y_max
+    return [(x / (size - 1.0), tuple(int(round(c * scale)) for c in color) + (255,)) for x, color in stops]
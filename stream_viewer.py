@@ -0,0 +1,398 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+Live colorization of 12-bit frames with the gradient being edited.
+
+Frames come from a file sequence, a named pipe or a socket, are decoded and
+coloured in two worker threads and painted from two alternating buffers.
+
+Example:
+python stream_viewer.py theme.txt "frames/*.npy" --fps 30
+python stream_viewer.py theme.txt pipe:/tmp/frames --shape 480x640
+python stream_viewer.py theme.txt socket:/tmp/frames.sock --shape 480x640
+"""
+
+import argparse
+import glob
+import os
+import queue
+import select
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+from PyQt5.QtCore import Qt, QRectF, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
+
+from colorize import colorize, open_frames
+from lut import CHANNELS, build_lut, to_8bit
+from points_io import read_points
+
+# How long the colour thread waits for a frame before re-colouring the last one with a new LUT
+IDLE_WAIT = 0.05
+# Displayed frames the fps figure is averaged over
+FPS_WINDOW = 30
+
+
+class FrameSource:
+    """
+    Base of the frame sources: read_frame() returns the next uint16 frame, or None at the end.
+    """
+
+    def read_frame(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FileSequenceSource(FrameSource):
+    """
+    Frames from .npy or raw .u16 files, in name order. A file may hold one frame
+    (h, w) or a stack (n, h, w); raw files need the frame shape.
+    """
+
+    def __init__(self, paths, shape=None, fps=None, loop=False):
+        if isinstance(paths, str):
+            paths = sorted(glob.glob(paths))
+        if not paths:
+            raise ValueError("No frame files found.")
+        self.paths = list(paths)
+        self.shape = shape
+        self.interval = 1.0 / fps if fps else 0.0
+        self.loop = loop
+        self._frames = self._iter_frames()
+        self._next_time = time.perf_counter()
+
+    def _iter_frames(self):
+        while True:
+            for path in self.paths:
+                frames = open_frames(path)
+                if frames.ndim == 1:
+                    if self.shape is None:
+                        raise ValueError(f"{path} is raw data, the frame shape is needed.")
+                    frames = frames.reshape((-1,) + tuple(self.shape))
+                for frame in (frames,) if frames.ndim == 2 else frames:
+                    yield frame
+            if not self.loop:
+                return
+
+    def read_frame(self):
+        if self.interval:
+            # Paced like the camera would deliver them
+            delay = self._next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time = max(self._next_time + self.interval, time.perf_counter() - self.interval)
+        return next(self._frames, None)
+
+
+class StreamSource(FrameSource):
+    """
+    Raw little-endian uint16 frames of a fixed shape read back to back from a stream.
+    """
+
+    def __init__(self, shape):
+        self.shape = tuple(shape)
+        self._size = int(np.prod(self.shape)) * 2
+
+    def _read_into(self, view):
+        raise NotImplementedError
+
+    def read_frame(self):
+        buffer = bytearray(self._size)
+        view = memoryview(buffer)
+        filled = 0
+        while filled < self._size:
+            count = self._read_into(view[filled:])
+            if not count:
+                return None
+            filled += count
+        return np.frombuffer(buffer, dtype="<u2").reshape(self.shape)
+
+
+class PipeSource(StreamSource):
+    """
+    Frames written into a named pipe (FIFO) or any other file that can be read sequentially.
+
+    A blocking open of a FIFO waits for a writer, so it is opened non-blocking and
+    the reads wait for data in short slices, which also lets close() end a wait.
+    """
+
+    def __init__(self, path, shape):
+        super().__init__(shape)
+        self._closed = False
+        self._nonblocking = hasattr(os, "O_NONBLOCK")
+        if self._nonblocking:
+            self._fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        else:
+            # No FIFOs without O_NONBLOCK (Windows), a plain file doesn't block
+            self._file = open(path, "rb", buffering=0)
+
+    def _read_into(self, view):
+        if not self._nonblocking:
+            return self._file.readinto(view)
+        while not self._closed:
+            ready, _, _ = select.select([self._fd], [], [], IDLE_WAIT)
+            if not ready or self._closed:
+                continue
+            try:
+                return os.readv(self._fd, [view])
+            except BlockingIOError:
+                continue
+        return 0
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._nonblocking:
+            os.close(self._fd)
+        else:
+            self._file.close()
+
+
+class SocketSource(StreamSource):
+    """Frames sent over a Unix socket (a path) or TCP ("host:port"), as the camera link would."""
+
+    def __init__(self, address, shape):
+        super().__init__(shape)
+        if ":" in address and not os.path.exists(address):
+            host, port = address.rsplit(":", 1)
+            self._socket = socket.create_connection((host, int(port)))
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(address)
+
+    def _read_into(self, view):
+        return self._socket.recv_into(view)
+
+    def close(self):
+        self._socket.close()
+
+
+def open_source(spec, shape=None, fps=None, loop=False):
+    """
+    Opens a frame source from a short description.
+
+    Arguments:
+    spec -- "pipe:PATH", "socket:PATH" or "socket:HOST:PORT", otherwise a file glob
+    shape -- (height, width) of raw frames
+    fps -- pace of a file sequence (default: as fast as they are read)
+    loop -- start a file sequence over at its end
+    """
+    kind, _, target = spec.partition(":")
+    if kind in ("pipe", "socket"):
+        if shape is None:
+            raise ValueError("Streams are raw frames, the frame shape is needed.")
+        return PipeSource(target, shape) if kind == "pipe" else SocketSource(target, shape)
+    return FileSequenceSource(spec, shape, fps, loop)
+
+
+class StreamPipeline:
+    """
+    Decodes and colours frames in two threads.
+
+    The decode thread reads the source into a one-slot queue; if the colour thread
+    hasn't taken the previous frame yet it is replaced, so under back-pressure the
+    stream skips to the newest frame instead of falling behind. The colour thread
+    writes into the back of two RGB buffers and swaps them with the front under a
+    lock the painter also takes, so a frame is never painted while it is written.
+
+    The LUT is published as one (table, key) tuple, replaced by a single assignment,
+    so the colour thread sees either the old table or the new one, never a mix.
+    Tables must not be modified once published (GradientLUT's are read-only).
+    """
+
+    def __init__(self, source, lut, key=None, on_frame=None, on_error=None):
+        self.source = source
+        self.on_frame = on_frame
+        # Called from the decode thread with the message when the source fails
+        self.on_error = on_error
+        self._lut = (to_8bit(lut), key)
+        self._frames = queue.Queue(maxsize=1)
+        self._swap = threading.Lock()
+        self._stop = threading.Event()
+        self._buffers = []
+        self.front = None
+        self.front_shown = True
+        self.decoded = 0
+        self.colored = 0
+        # One counter per thread: frames replaced before colouring, coloured frames never painted
+        self.replaced = 0
+        self.overwritten = 0
+        self._threads = [threading.Thread(target=self._decode, name="stream-decode", daemon=True),
+                         threading.Thread(target=self._color, name="stream-color", daemon=True)]
+
+    @property
+    def dropped(self):
+        return self.replaced + self.overwritten
+
+    def publish_lut(self, lut, key=None):
+        # Shown as 8-bit RGB, so a 16-bit table is converted before it is published
+        self._lut = (to_8bit(lut), key)
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.source.close()
+        for thread in self._threads:
+            thread.join(1.0)
+
+    def _decode(self):
+        while not self._stop.is_set():
+            try:
+                frame = self.source.read_frame()
+            except (OSError, ValueError) as e:
+                # A failure after stop() is only the source being closed under the read
+                if self.on_error is not None and not self._stop.is_set():
+                    self.on_error(str(e))
+                frame = None
+            if frame is None:
+                break
+            self.decoded += 1
+            try:
+                self._frames.put_nowait(frame)
+            except queue.Full:
+                # Replace the frame nobody has coloured yet with the newer one
+                try:
+                    self._frames.get_nowait()
+                    self.replaced += 1
+                except queue.Empty:
+                    pass
+                self._frames.put_nowait(frame)
+
+    def _buffers_for(self, shape):
+        if not self._buffers or self._buffers[0][0].shape[:2] != shape:
+            self._buffers = []
+            for _ in range(2):
+                rgb = np.empty(shape + (3,), dtype=np.uint8)
+                self._buffers.append((rgb, QImage(rgb.data, shape[1], shape[0], shape[1] * 3,
+                                                  QImage.Format_RGB888)))
+        return self._buffers
+
+    def _color(self):
+        frame, colored_key = None, None
+        while not self._stop.is_set():
+            try:
+                frame = self._frames.get(timeout=IDLE_WAIT)
+            except queue.Empty:
+                # No new frame: only re-colour the last one if the gradient changed
+                if frame is None or self._lut[1] == colored_key:
+                    continue
+
+            lut, colored_key = self._lut
+            buffers = self._buffers_for(frame.shape)
+            back = buffers[1] if self.front is buffers[0] else buffers[0]
+            colorize(frame, lut, out=back[0])
+            with self._swap:
+                if self.front is not None and not self.front_shown:
+                    self.overwritten += 1
+                self.front = back
+                self.front_shown = False
+            self.colored += 1
+            if self.on_frame is not None:
+                self.on_frame()
+
+    @contextmanager
+    def front_image(self):
+        # The front QImage (or None), not swapped or written while the block runs
+        with self._swap:
+            self.front_shown = True
+            yield self.front[1] if self.front is not None else None
+
+
+class StreamViewer(QWidget):
+    """
+    Paints the frames of a StreamPipeline scaled to the widget, with an fps readout.
+    """
+
+    frameReady = pyqtSignal()
+    # The source failed, with the message; the last frame stays on screen
+    streamFailed = pyqtSignal(str)
+
+    def __init__(self, source, lut, key=None, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(160, 120)
+        self.readout = QLabel(self)
+        self.readout.setStyleSheet("color: #ffffff; background: rgba(0, 0, 0, 128); padding: 2px;")
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.readout, 0, Qt.AlignLeft | Qt.AlignTop)
+        layout.addStretch()
+
+        # Times new frames were painted, for the fps figure
+        self._shown = deque(maxlen=FPS_WINDOW)
+        self._shown_front = None
+        # Emitted from the colour thread, delivered in the GUI thread
+        self.frameReady.connect(self.update)
+        self.error = None
+        self.streamFailed.connect(self.stream_failed)
+        self.pipeline = StreamPipeline(source, lut, key, on_frame=self.frameReady.emit,
+                                       on_error=self.streamFailed.emit)
+        self.pipeline.start()
+
+    def set_lut(self, lut, key=None):
+        self.pipeline.publish_lut(lut, key)
+
+    def stream_failed(self, message):
+        self.error = message
+        self.update()
+
+    def fps(self):
+        if len(self._shown) < 2:
+            return 0.0
+        return (len(self._shown) - 1) / (self._shown[-1] - self._shown[0])
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        with self.pipeline.front_image() as image:
+            if image is not None:
+                # Keep the aspect ratio inside the widget
+                scale = min(self.width() / image.width(), self.height() / image.height())
+                width, height = image.width() * scale, image.height() * scale
+                target = QRectF((self.width() - width) / 2, (self.height() - height) / 2, width, height)
+                painter.drawImage(target, image)
+                if self.pipeline.colored != self._shown_front:
+                    self._shown_front = self.pipeline.colored
+                    self._shown.append(time.perf_counter())
+        painter.end()
+        pipeline = self.pipeline
+        text = f"{self.fps():.1f} fps  {pipeline.colored} frames, {pipeline.dropped} dropped"
+        self.readout.setText(text if self.error is None else f"{text}  ({self.error})")
+
+    def closeEvent(self, event):
+        self.pipeline.stop()
+        super().closeEvent(event)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch 12-bit frames coloured with a gradient.")
+    parser.add_argument("points", help="points file written by Export Points")
+    parser.add_argument("source", help='file glob (e.g. "frames/*.npy"), pipe:PATH, socket:PATH or socket:HOST:PORT')
+    parser.add_argument("--shape", help="HxW of raw frames")
+    parser.add_argument("--fps", type=float, help="pace of a file sequence")
+    parser.add_argument("--loop", action="store_true", help="play a file sequence over and over")
+    args = parser.parse_args(argv)
+
+    app = QApplication(sys.argv[:1])
+    points = read_points(args.points)
+    shape = tuple(int(v) for v in args.shape.lower().split("x")) if args.shape else None
+    viewer = StreamViewer(open_source(args.source, shape, args.fps, args.loop),
+                          build_lut(*(points[color] for color in CHANNELS)))
+    viewer.resize(800, 600)
+    viewer.show()
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
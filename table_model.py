@@ -0,0 +1,128 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+HEADERS = ["Signal", "Gradient", "Red", "Green", "Blue"]
+# Table column of every channel's y value
+CHANNEL_COLUMNS = {"Red": 2, "Green": 3, "Blue": 4}
+
+TABLE_STYLE = """
+QTableView {
+    border: 2px solid #ffffff;
+    border-radius:5px;
+    color:rgb(255, 255, 255);
+    background:transparent;
+}
+
+QTableView::item {
+    padding: 4px;
+    border:  1px solid #ffffff;
+    color: rgb(255, 255, 255);
+    background:transparent;
+}
+"""
+
+
+class PointTableModel(QAbstractTableModel):
+    """
+    Table of the point store: one row per point, the Signal column holds the red x positions.
+
+    Edits are written straight into the points and reported with pointsEdited(color, row);
+    color is "Signal" when an x position was typed in. cellEdited(row, column, value) reports
+    the edit as it was typed, before the points are reordered.
+    """
+
+    pointsEdited = pyqtSignal(str, int)
+    cellEdited = pyqtSignal(int, int, int)
+
+    def __init__(self, points, parent=None):
+        super().__init__(parent)
+        self.points = points
+
+    def set_points(self, points):
+        self.beginResetModel()
+        self.points = points
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return max(len(self.points[color]) for color in CHANNEL_COLUMNS)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+        if index.column() != 1 and self.data(index) is not None:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+
+        row, column = index.row(), index.column()
+        if column < 2:
+            red_points = self.points["Red"]
+            if row >= len(red_points):
+                return None
+            x = red_points[row][0]
+            return f"{x}" if column == 0 else f"{x / self.points.depth.x_max}"
+
+        channel = self.points[HEADERS[column]]
+        if row >= len(channel):
+            return None
+        return f"{channel[row][1]}"
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        try:
+            value = int(value)
+        except ValueError:
+            return False
+
+        row, column = index.row(), index.column()
+        # Values outside the domain or the output range are refused, the cell shows the old value again
+        limit = self.points.depth.x_max if column == 0 else self.points.depth.y_max
+        if not 0 <= value <= limit:
+            return False
+        if column in (0,) + tuple(CHANNEL_COLUMNS.values()):
+            self.cellEdited.emit(row, column, value)
+        if column == 0:
+            # A typed signal value moves the point in every channel that has this row,
+            # which may reorder the rows
+            for color in CHANNEL_COLUMNS:
+                if row < len(self.points[color]):
+                    self.points[color][row] = (value, self.points[color][row][1])
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, len(HEADERS) - 1))
+            self.pointsEdited.emit("Signal", row)
+        elif column in CHANNEL_COLUMNS.values():
+            color = HEADERS[column]
+            self.points[color][row] = (self.points[color][row][0], value)
+            self.dataChanged.emit(index, index)
+            self.pointsEdited.emit(color, row)
+        else:
+            return False
+        return True
+
+    def point_changed(self, color, row):
+        # A point's y moved: only its own cell changes
+        index = self.index(row, CHANNEL_COLUMNS[color])
+        self.dataChanged.emit(index, index)
+
+    def refresh(self):
+        # Points were added or removed: rows may have shifted
+        self.beginResetModel()
+        self.endResetModel()
@@ -0,0 +1,253 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+A library of named gradients: a directory of points files with a manifest.
+
+The manifest (manifest.json) holds every theme's file name, bit depth and content
+hash, so listing hundreds of themes reads one small file; the points themselves
+are only parsed when a theme is used.
+
+python themes.py list themes/
+python themes.py index themes/                 (rebuild the manifest from the .txt files)
+python themes.py export themes/ out/ --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache import LRUCache
+from lut import CHANNELS, BitDepth, GradientLUT, depth_for_points
+from points_io import format_points, read_points, write_lut, write_points
+
+MANIFEST = "manifest.json"
+# Written next to the exports, theme name -> content hash of the last export
+EXPORT_STATE = ".export-state.json"
+EXPORT_FORMATS = (".txt", ".npy", ".raw", ".h", ".cube", ".csv", ".png")
+# Parsed themes and built LUTs kept in memory
+THEME_CACHE_SIZE = 64
+
+
+def content_hash(points, depth):
+    # Independent of the theme's name, so a renamed theme keeps its hash
+    text = f"{depth.input_bits}/{depth.output_bits}\n" + format_points(points, prefix="")
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def theme_file_name(name):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in name) + ".txt"
+
+
+def theme_prefix(name):
+    # The name as a C identifier, for the array names of the points file and the .h export
+    prefix = re.sub(r"\W", "_", name, flags=re.ASCII)
+    return "_" + prefix if prefix[:1].isdigit() else prefix
+
+
+class ThemeStore:
+    """
+    The themes of one directory.
+
+    Opening a store only reads the manifest. points() parses a theme's file on first
+    use and table() builds its LUT; both are kept in LRU caches, the tables keyed by
+    content hash so identical themes share one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.themes = {}
+        self._points = LRUCache(THEME_CACHE_SIZE)
+        self._tables = LRUCache(THEME_CACHE_SIZE)
+        manifest = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                self.themes = json.load(f)["themes"]
+
+    def __len__(self):
+        return len(self.themes)
+
+    def __contains__(self, name):
+        return name in self.themes
+
+    def names(self):
+        return sorted(self.themes, key=str.lower)
+
+    def depth(self, name):
+        info = self.themes[name]
+        return BitDepth(info["input_bits"], info["output_bits"])
+
+    def file_path(self, name):
+        return os.path.join(self.path, self.themes[name]["file"])
+
+    def points(self, name):
+        return self._points.get_or_build(name, lambda: read_points(self.file_path(name)))
+
+    def table(self, name):
+        depth = self.depth(name)
+        points = self.points(name)
+        return self._tables.get_or_build(self.themes[name]["hash"], lambda: GradientLUT(
+            depth.size, cache_size=1, dtype=depth.dtype).table(points))
+
+    def save(self, name, points, depth=None):
+        """
+        Adds or replaces a theme and updates the manifest.
+
+        Arguments:
+        name -- theme name, also the prefix of its arrays in the points file (see theme_prefix)
+        points -- dict of lists of (x, y) tuples keyed by "Red", "Green" and "Blue"
+        depth -- BitDepth of the points (default: guessed from them)
+        """
+        points = {color: [tuple(point) for point in points[color]] for color in CHANNELS}
+        depth = depth_for_points(points) if depth is None else depth
+        os.makedirs(self.path, exist_ok=True)
+        file_name = self.themes[name]["file"] if name in self.themes else self.free_file_name(name)
+        write_points(os.path.join(self.path, file_name), points, prefix=theme_prefix(name))
+        self.themes[name] = {"file": file_name, "input_bits": depth.input_bits, "output_bits": depth.output_bits,
+                             "hash": content_hash(points, depth)}
+        self._points.put(name, points)
+        self.write_manifest()
+
+    def free_file_name(self, name):
+        # "Hot Theme" and "Hot_Theme" map to the same file, the later one gets Hot_Theme_2.txt.
+        # Compared case-insensitively, as two themes may not share a file on Windows or macOS either
+        taken = {info["file"].lower() for info in self.themes.values()}
+        base = theme_file_name(name)[:-4]
+        file_name, suffix = base + ".txt", 2
+        while file_name.lower() in taken or os.path.exists(os.path.join(self.path, file_name)):
+            file_name, suffix = f"{base}_{suffix}.txt", suffix + 1
+        return file_name
+
+    def remove(self, name):
+        os.remove(self.file_path(name))
+        del self.themes[name]
+        self.write_manifest()
+
+    def write_manifest(self):
+        # Written beside the old one and swapped in, so readers never see half a manifest
+        manifest = os.path.join(self.path, MANIFEST)
+        with open(manifest + ".tmp", "w") as f:
+            json.dump({"version": 1, "themes": self.themes}, f, indent=1, sort_keys=True)
+        os.replace(manifest + ".tmp", manifest)
+
+    def index(self):
+        """
+        Rebuilds the manifest from the points files in the directory, e.g. after
+        copying exported themes in. A theme is named after its file.
+        """
+        self.themes = {}
+        self._points.clear()
+        for file_name in sorted(os.listdir(self.path)):
+            if not file_name.endswith(".txt"):
+                continue
+            points = read_points(os.path.join(self.path, file_name))
+            depth = depth_for_points(points)
+            self.themes[os.path.splitext(file_name)[0]] = {
+                "file": file_name, "input_bits": depth.input_bits, "output_bits": depth.output_bits,
+                "hash": content_hash(points, depth)}
+        self.write_manifest()
+
+
+def export_theme(points_path, name, depth, output_dir, formats=EXPORT_FORMATS):
+    # Runs in a worker process: one theme in every format, named after its points file,
+    # which the store keeps unique where two theme names would give the same file name
+    from image_export import export_gradient_image
+
+    start = time.perf_counter()
+    depth = BitDepth(*depth)
+    points = read_points(points_path)
+    lut = GradientLUT(depth.size, cache_size=1, dtype=depth.dtype).table(points)
+    base = os.path.join(output_dir, os.path.splitext(os.path.basename(points_path))[0])
+    for extension in formats:
+        if extension == ".png":
+            export_gradient_image(base + extension, lut, bit_depth=depth.output_bits)
+        else:
+            write_lut(base + extension, lut, points, prefix=theme_prefix(name))
+    return name, time.perf_counter() - start
+
+
+def export_all(store, output_dir, formats=EXPORT_FORMATS, workers=None, force=False):
+    """
+    Exports every theme in every format in parallel, skipping themes whose content
+    hash matches the last export to output_dir.
+
+    Returns:
+    Tuple (exported, skipped, failed) theme counts
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = os.path.join(output_dir, EXPORT_STATE)
+    state = {}
+    if os.path.exists(state_path) and not force:
+        with open(state_path) as f:
+            state = json.load(f)
+
+    formats_key = ",".join(formats)
+    pending = [name for name in store.names()
+               if state.get(name) != [store.themes[name]["hash"], formats_key]]
+    skipped = len(store) - len(pending)
+    failed = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(export_theme, store.file_path(name), name, tuple(store.depth(name)),
+                               output_dir, formats): name for name in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            name = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[{done}/{len(pending)}] {name} failed: {e}")
+                continue
+            state[name] = [store.themes[name]["hash"], formats_key]
+
+    # Themes that no longer exist are forgotten
+    state = {name: value for name, value in state.items() if name in store}
+    with open(state_path, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+
+    exported = len(pending) - failed
+    print(f"{exported} themes exported, {skipped} unchanged, {failed} failed "
+          f"in {time.perf_counter() - start:.2f} s")
+    return exported, skipped, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage a directory of gradient themes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    listing = commands.add_parser("list", help="list the themes of the manifest")
+    listing.add_argument("themes")
+    index = commands.add_parser("index", help="rebuild the manifest from the .txt files")
+    index.add_argument("themes")
+    export = commands.add_parser("export", help="export every changed theme in every format")
+    export.add_argument("themes")
+    export.add_argument("output_dir")
+    export.add_argument("--formats", default=",".join(EXPORT_FORMATS),
+                        help=f"comma-separated extensions (default: {','.join(EXPORT_FORMATS)})")
+    export.add_argument("--workers", type=int, help="number of processes (default: all cores)")
+    export.add_argument("--force", action="store_true", help="export unchanged themes too")
+    args = parser.parse_args(argv)
+
+    store = ThemeStore(args.themes)
+    if args.command == "list":
+        for name in store.names():
+            depth = store.depth(name)
+            print(f"{name:32} {depth.input_bits:2}-bit in {depth.output_bits:2}-bit out  {store.themes[name]['hash'][:12]}")
+        return 0
+    if args.command == "index":
+        store.index()
+        print(f"{len(store)} themes indexed")
+        return 0
+
+    formats = tuple(f if f.startswith(".") else "." + f for f in args.formats.split(","))
+    _, _, failed = export_all(store, args.output_dir, formats, args.workers, args.force)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+# Author: Muhammad Abdullah Javaid
+# Email: abdullahjavaid0307@gmail.com
+
+"""
+Pan and zoom through huge 12-bit images coloured with a gradient.
+
+The image is memory-mapped and cut into tiles; only the tiles in view are read,
+downsampled to the zoom level and coloured, and both the downsampled and the
+coloured tiles are kept in bounded LRU caches.
+
+Example:
+python tile_viewer.py theme.txt survey.npy
+python tile_viewer.py theme.txt survey.u16 --shape 40000x60000 --mean
+"""
+
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+from PyQt5.QtCore import Qt, QPointF, QRectF, QSize
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
+
+from cache import LRUCache
+from colorize import colorize, open_frames
+from lut import CHANNELS, build_lut, to_8bit
+from points_io import read_points
+
+# Tile edge in pixels of its pyramid level
+TILE_SIZE = 256
+# Downsampled value tiles kept (128 KB each)
+LEVEL_CACHE_SIZE = 256
+# Coloured tiles kept (192 KB each as RGB)
+TILE_CACHE_SIZE = 256
+# Zoom factor of one wheel step or +/- key
+ZOOM_STEP = 1.25
+# Largest magnification, screen pixels per image pixel
+MAX_SCALE = 32.0
+
+
+def open_image(path, shape=None):
+    """
+    Memory-maps a .npy or raw little-endian .u16 image without reading it.
+
+    Arguments:
+    path -- image file; a stack of frames opens its first frame
+    shape -- (height, width) of a raw file
+    """
+    image = open_frames(path, shape)
+    if image.ndim == 3:
+        image = image[0]
+    if image.ndim != 2:
+        raise ValueError(f"{path} is not a 2-D image; raw files need --shape HxW.")
+    return image
+
+
+class ImagePyramid:
+    """
+    The levels of an image, each half the size of the one below, built tile by tile on demand.
+
+    Level 0 tiles are copied out of the memory map. Higher levels either take every
+    2**level-th pixel (the default, which reads no more than it shows) or, with mean,
+    average 2x2 blocks of the four tiles of the level below (smoother, but the first
+    zoomed-out view reads every pixel under it once).
+    """
+
+    def __init__(self, image, tile_size=TILE_SIZE, mean=False, cache_size=LEVEL_CACHE_SIZE):
+        self.image = image
+        self.tile_size = tile_size
+        self.mean = mean
+        # Levels until the whole image fits in one tile
+        self.levels = max(0, math.ceil(math.log2(max(image.shape) / tile_size))) + 1
+        self._tiles = LRUCache(cache_size)
+
+    def shape(self, level):
+        height, width = self.image.shape
+        return -(-height // (1 << level)), -(-width // (1 << level))
+
+    def tile_grid(self, level):
+        # Number of tile rows and columns of a level
+        height, width = self.shape(level)
+        return -(-height // self.tile_size), -(-width // self.tile_size)
+
+    def tile(self, level, row, column):
+        """
+        Returns:
+        uint16 array of up to tile_size x tile_size values of the level
+        """
+        return self._tiles.get_or_build((level, row, column), lambda: self._build(level, row, column))
+
+    def _build(self, level, row, column):
+        size = self.tile_size
+        height, width = self.shape(level)
+        top, left = row * size, column * size
+        bottom, right = min(top + size, height), min(left + size, width)
+        if level == 0 or not self.mean:
+            step = 1 << level
+            return np.ascontiguousarray(self.image[top * step:bottom * step:step, left * step:right * step:step])
+
+        # 2x2 block mean of the (up to) four tiles below, the last row and column repeated when odd
+        rows, columns = self.tile_grid(level - 1)
+        below = np.block([[self.tile(level - 1, r, c) for c in range(2 * column, min(2 * column + 2, columns))]
+                          for r in range(2 * row, min(2 * row + 2, rows))]).astype(np.uint32)
+        if below.shape[0] % 2:
+            below = np.concatenate([below, below[-1:]], axis=0)
+        if below.shape[1] % 2:
+            below = np.concatenate([below, below[:, -1:]], axis=1)
+        blocks = below.reshape(below.shape[0] // 2, 2, below.shape[1] // 2, 2).sum(axis=(1, 3))
+        return ((blocks + 2) // 4).astype(np.uint16)
+
+
+class TileViewer(QWidget):
+    """
+    Paints the tiles of the visible part of an image at the zoom level nearest the
+    screen resolution. Drag to pan, wheel or +/- to zoom, 0 to fit the image.
+
+    Coloured tiles are cached under the LUT's key, so a new gradient misses and
+    recolours only the tiles in view, and going back to a recent one finds them again.
+    """
+
+    def __init__(self, image, lut, key=None, mean=False, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(160, 120)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.readout = QLabel(self)
+        self.readout.setStyleSheet("color: #ffffff; background: rgba(0, 0, 0, 128); padding: 2px;")
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.readout, 0, Qt.AlignLeft | Qt.AlignTop)
+        layout.addStretch()
+
+        self.pyramid = ImagePyramid(image, mean=mean)
+        self._colored = LRUCache(TILE_CACHE_SIZE)
+        self._lut, self._key = to_8bit(lut), key
+        # Screen pixels per image pixel, and the image position at the widget's top left
+        self.scale = None
+        self.origin = QPointF(0, 0)
+        # The whole image is shown, and kept fitted on resizes, until the view is panned or zoomed
+        self.fitted = True
+        self._drag = None
+        self.paint_ms = 0.0
+
+    def sizeHint(self):
+        # Docks open at the size hint, the minimum is too small to look around in
+        return QSize(480, 360)
+
+    def set_lut(self, lut, key=None):
+        if key is not None and key == self._key:
+            return
+        self._lut, self._key = to_8bit(lut), key
+        if key is None:
+            # Without a key nothing cached can be told apart from the new gradient
+            self._colored.clear()
+        self.update()
+
+    def fit(self):
+        height, width = self.pyramid.image.shape
+        self.scale = min(self.width() / width, self.height() / height)
+        self.origin = QPointF((width - self.width() / self.scale) / 2, (height - self.height() / self.scale) / 2)
+        self.fitted = True
+        self.update()
+
+    def level(self):
+        # Coarsest level that still has at least one pixel per screen pixel
+        if self.scale >= 1:
+            return 0
+        return min(int(math.log2(1 / self.scale)), self.pyramid.levels - 1)
+
+    def zoom(self, factor, anchor=None):
+        # Zooms keeping the image point under anchor (widget coordinates) in place
+        anchor = QPointF(self.width() / 2, self.height() / 2) if anchor is None else QPointF(anchor)
+        fixed = self.origin + anchor / self.scale
+        smallest = min(self.width() / self.pyramid.image.shape[1], self.height() / self.pyramid.image.shape[0]) / 2
+        self.scale = min(max(self.scale * factor, smallest), MAX_SCALE)
+        self.origin = fixed - anchor / self.scale
+        self.fitted = False
+        self.update()
+
+    def _colored_tile(self, level, row, column):
+        def build():
+            values = self.pyramid.tile(level, row, column)
+            rgb = colorize(values, self._lut)
+            return rgb, QImage(rgb.data, rgb.shape[1], rgb.shape[0], rgb.shape[1] * 3, QImage.Format_RGB888)
+
+        # The array stays cached next to the QImage that points into it
+        return self._colored.get_or_build((self._key, level, row, column), build)[1]
+
+    def visible_tiles(self):
+        """
+        Returns:
+        Tuple (level, list of (row, column)) of the tiles in view
+        """
+        level = self.level()
+        span = self.pyramid.tile_size * (1 << level)
+        rows, columns = self.pyramid.tile_grid(level)
+        left, top = self.origin.x(), self.origin.y()
+        right, bottom = left + self.width() / self.scale, top + self.height() / self.scale
+        row_range = range(max(int(top // span), 0), min(int(bottom // span) + 1, rows))
+        column_range = range(max(int(left // span), 0), min(int(right // span) + 1, columns))
+        return level, [(row, column) for row in row_range for column in column_range]
+
+    def resizeEvent(self, event):
+        if self.fitted:
+            self.fit()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self.scale is None:
+            self.fit()
+        start = time.perf_counter()
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        level, tiles = self.visible_tiles()
+        step = 1 << level
+        span = self.pyramid.tile_size * step
+        for row, column in tiles:
+            image = self._colored_tile(level, row, column)
+            target = QRectF((column * span - self.origin.x()) * self.scale, (row * span - self.origin.y()) * self.scale,
+                            image.width() * step * self.scale, image.height() * step * self.scale)
+            painter.drawImage(target, image)
+        painter.end()
+        self.paint_ms = (time.perf_counter() - start) * 1e3
+        self.readout.setText(f"{self.scale * 100:.3g}%  level {level}  {len(tiles)} tiles  "
+                             f"{len(self._colored)} cached  {self.paint_ms:.1f} ms")
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag = QPointF(event.pos())
+
+    def mouseMoveEvent(self, event):
+        if self._drag is not None:
+            position = QPointF(event.pos())
+            self.origin -= (position - self._drag) / self.scale
+            self._drag = position
+            self.fitted = False
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag = None
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.zoom(ZOOM_STEP ** steps, event.pos())
+
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_Plus, Qt.Key_Equal):
+            self.zoom(ZOOM_STEP)
+        elif event.key() == Qt.Key_Minus:
+            self.zoom(1 / ZOOM_STEP)
+        elif event.key() == Qt.Key_0:
+            self.fit()
+        else:
+            super().keyPressEvent(event)
+
+
+def parse_shape(text):
+    return tuple(int(v) for v in text.lower().split("x")) if text else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pan and zoom through a huge 12-bit image coloured with a gradient.")
+    parser.add_argument("points", help="points file written by Export Points")
+    parser.add_argument("image", help=".npy or raw .u16 image")
+    parser.add_argument("--shape", help="HxW of a raw image")
+    parser.add_argument("--mean", action="store_true", help="average 2x2 blocks when zoomed out instead of skipping pixels")
+    args = parser.parse_args(argv)
+
+    app = QApplication(sys.argv[:1])
+    points = read_points(args.points)
+    viewer = TileViewer(open_image(args.image, parse_shape(args.shape)),
+                        build_lut(*(points[color] for color in CHANNELS)), mean=args.mean)
+    viewer.resize(1000, 800)
+    viewer.show()
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(main())